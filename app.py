@@ -1,10 +1,16 @@
 # app.py (for deployment)
 
 from dash_app import create_dashboard
+from exports import register_exports
+from web_auth import register_auth
+from web_metrics import register_metrics
 from flask import Flask
 
 # Gunicorn looks for this 'server' variable
 server = Flask(__name__) 
 app = create_dashboard(server)
+register_exports(server)
+register_auth(server)
+register_metrics(server)
 
 # The if __name__ == '__main__' block is not needed for deployment
\ No newline at end of file
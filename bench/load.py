@@ -0,0 +1,353 @@
+"""
+Load test for the Dash/Flask server: simulated teachers hitting the real
+callback endpoints concurrently.
+
+By default it generates a synthetic roster in a scratch directory, seeds
+the SQLite store from it, starts `gunicorn app:server` on localhost and
+runs the user mix against it; --url targets a server that is already
+running instead (its roster is read from --roster for student IDs, and the
+`save` action really writes to it). Every simulated user keeps one HTTP
+connection open and loops over actions picked by weight:
+
+    dashboard  update_dashboard    POST /_dash-update-component
+    roster     update_roster_page  POST /_dash-update-component paging, sorting or searching the roster table
+    profile    display_page        POST /_dash-update-component with url.pathname = /profile/<id>
+    save       save_student_data   POST /_dash-update-component from /entry/<id>
+
+The report gives p50/p95/p99 latency, throughput and errors per callback.
+The generator competes with the server for CPU, so on a small machine run
+it from another host against --url for numbers that reflect the server alone.
+
+    python -m bench.load --users 20 --duration 60 --mix browse
+    python -m bench.load --mix dashboard=5,profile=4,save=1 --workers 4 --threads 8
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+MIXES = {
+    'browse': {'dashboard': 3, 'roster': 4, 'profile': 6, 'save': 1},
+    'grading': {'dashboard': 2, 'roster': 2, 'profile': 3, 'save': 5},
+    'read-only': {'dashboard': 1, 'roster': 1, 'profile': 1},
+}
+CALLBACKS = {
+    'dashboard': 'update_dashboard', 'roster': 'update_roster_page',
+    'profile': 'display_page', 'save': 'save_student_data',
+}
+# Columns the roster table can be sorted by, and how far into it a teacher pages
+ROSTER_SORT_COLUMNS = ['StudentID', 'StudentLink', 'AvgScore', 'Attendance', 'RiskPct']
+ROSTER_PAGE_SIZES = [10, 25, 50]
+ROSTER_MAX_PAGE = 20
+PERCENTILES = (50, 95, 99)
+READY_TIMEOUT = 120
+
+# --- Requests ---
+def _outputs(output):
+    return [{"id": o.rsplit('.', 1)[0], "property": o.rsplit('.', 1)[1]} for o in output.strip('.').split('...')]
+
+def dashboard_request(student, version, rng=random):
+    output = "..kpi-cards-row.children...subject-avg-chart.figure...performance-dist-chart.figure.."
+    return {
+        "output": output, "outputs": _outputs(output),
+        "inputs": [{"id": "student-data-store", "property": "data", "value": {"version": version}}],
+        "changedPropIds": ["student-data-store.data"], "state": [],
+    }
+
+def roster_request(student, version, rng=random):
+    """One roster table update: a page turn, a new sort order or a search for part of a name or ID."""
+    output = "..student-roster-table.data...student-roster-table.page_count...student-roster-table.page_current.."
+    student_id, name = student
+    change = rng.choice(['page_current', 'sort_by', 'search'])
+    page_current = rng.randint(0, ROSTER_MAX_PAGE) if change == 'page_current' else 0
+    sort_by = [{"column_id": rng.choice(ROSTER_SORT_COLUMNS), "direction": rng.choice(["asc", "desc"])}] \
+        if change == 'sort_by' or rng.random() < 0.3 else []
+    query = rng.choice([name.split()[0][:rng.randint(2, 5)], student_id]) if change == 'search' else ""
+    return {
+        "output": output, "outputs": _outputs(output),
+        "inputs": [
+            {"id": "student-data-store", "property": "data", "value": {"version": version}},
+            {"id": "student-roster-table", "property": "page_current", "value": page_current},
+            {"id": "student-roster-table", "property": "page_size", "value": rng.choice(ROSTER_PAGE_SIZES)},
+            {"id": "student-roster-table", "property": "sort_by", "value": sort_by},
+            {"id": "student-roster-table", "property": "filter_query", "value": ""},
+            {"id": "roster-search", "property": "value", "value": query},
+        ],
+        "changedPropIds": ["roster-search.value" if change == 'search' else f"student-roster-table.{change}"],
+        "state": [],
+    }
+
+def profile_request(student, version, rng=random):
+    return {
+        "output": "page-content.children", "outputs": {"id": "page-content", "property": "children"},
+        "inputs": [{"id": "url", "property": "pathname", "value": f"/profile/{student[0]}"}],
+        "changedPropIds": ["url.pathname"], "state": [],
+    }
+
+def save_request(student, version, rng=random):
+    student_id, name = student
+    output = "..url.pathname...student-data-store.data.."
+    state = [
+        {"id": "url", "property": "pathname", "value": f"/entry/{student_id}"},
+        {"id": "student-data-store", "property": "data", "value": {"version": version}},
+        {"id": "entry-student-id", "property": "value", "value": student_id},
+        {"id": "entry-student-name", "property": "value", "value": name},
+    ]
+    state += [{"id": f"entry-{s.lower()}-score", "property": "value", "value": rng.randint(40, 100)} for s in SUBJECTS]
+    state += [
+        {"id": "entry-attendance", "property": "value", "value": rng.randint(60, 100)},
+        {"id": "entry-remarks", "property": "value", "value": "Updated during load test."},
+        {"id": "entry-photo-url", "property": "value", "value": ""},
+    ]
+    return {
+        "output": output, "outputs": _outputs(output),
+        "inputs": [{"id": "save-entry-button", "property": "n_clicks", "value": 1}],
+        "changedPropIds": ["save-entry-button.n_clicks"], "state": state,
+    }
+
+REQUESTS = {'dashboard': dashboard_request, 'roster': roster_request, 'profile': profile_request, 'save': save_request}
+
+def parse_mix(text):
+    """A preset name from MIXES or 'action=weight,...'."""
+    if text in MIXES:
+        return dict(MIXES[text])
+    mix = {}
+    for part in text.split(','):
+        action, _, weight = part.partition('=')
+        action = action.strip()
+        if action not in REQUESTS:
+            raise ValueError(f"Unknown action '{action}' (expected one of {', '.join(REQUESTS)})")
+        mix[action] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one action with a positive weight.")
+    return mix
+
+# --- Simulated users ---
+class Recorder:
+    """Latencies (seconds) and error counts per action, shared by the user threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.bytes = {}
+
+    def record(self, action, seconds, size, ok):
+        with self._lock:
+            if ok:
+                self.latencies.setdefault(action, []).append(seconds)
+                self.bytes[action] = self.bytes.get(action, 0) + size
+            else:
+                self.errors[action] = self.errors.get(action, 0) + 1
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+class User(threading.Thread):
+    """One teacher: a keep-alive connection and a loop of weighted actions until stop is set."""
+    def __init__(self, base_url, students, mix, recorder, measuring, stop, think_time=0.0, seed=None):
+        super().__init__(daemon=True)
+        self.url = urlsplit(base_url)
+        self.students = students
+        self.actions, self.weights = zip(*mix.items())
+        self.recorder = recorder
+        self.measuring = measuring
+        self.stop = stop
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.version = "0"
+        self.conn = None
+
+    def _post(self, body):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=60)
+        payload = json.dumps(body)
+        self.conn.request("POST", self.url.path.rstrip('/') + "/_dash-update-component", payload,
+                          {"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        return response.status, response.read()
+
+    def run(self):
+        while not self.stop.is_set():
+            action = self.rng.choices(self.actions, self.weights)[0]
+            student = self.rng.choice(self.students)
+            body = REQUESTS[action](student, self.version, self.rng)
+            t0 = time.perf_counter()
+            try:
+                status, data = self._post(body)
+                ok = status == 200
+            except (OSError, http.client.HTTPException):
+                self.conn = None
+                ok, data = False, b""
+            elapsed = time.perf_counter() - t0
+            if ok and action == 'save':
+                # Later dashboard requests carry the version the save returned, as the browser would
+                store = json.loads(data).get('response', {}).get('student-data-store', {}).get('data') or {}
+                self.version = store.get('version', self.version)
+            if self.measuring.is_set():
+                self.recorder.record(action, elapsed, len(data), ok)
+            if self.think_time:
+                time.sleep(self.rng.expovariate(1 / self.think_time))
+
+def run_load(base_url, students, mix, users=10, duration=30.0, warmup=5.0, think_time=0.0, seed=0):
+    """Runs the simulated users; returns (recorder, measured seconds)."""
+    recorder = Recorder()
+    measuring, stop = threading.Event(), threading.Event()
+    threads = [User(base_url, students, mix, recorder, measuring, stop, think_time, seed + i) for i in range(users)]
+    for t in threads:
+        t.start()
+    time.sleep(warmup)
+    measuring.set()
+    t0 = time.perf_counter()
+    time.sleep(duration)
+    measuring.clear()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in threads:
+        t.join(timeout=60)
+    return recorder, elapsed
+
+def summarize(recorder, elapsed):
+    """{callback: {'requests', 'errors', 'rps', 'p50', 'p95', 'p99', 'mean', 'bytes_per_response'}} in seconds."""
+    report = {}
+    for action in sorted(set(recorder.latencies) | set(recorder.errors)):
+        lat = sorted(recorder.latencies.get(action, []))
+        row = {
+            'requests': len(lat),
+            'errors': recorder.errors.get(action, 0),
+            'rps': len(lat) / elapsed if elapsed else 0.0,
+            'mean': sum(lat) / len(lat) if lat else float('nan'),
+            'bytes_per_response': recorder.bytes.get(action, 0) / len(lat) if lat else 0,
+        }
+        row.update({f"p{p}": percentile(lat, p) for p in PERCENTILES})
+        report[CALLBACKS[action]] = row
+    return report
+
+# --- Server under test ---
+def wait_until_ready(base_url, timeout=READY_TIMEOUT, proc=None):
+    url = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=5)
+            conn.request("GET", url.path.rstrip('/') + "/_dash-layout")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base_url} did not come up within {timeout}s")
+
+def start_gunicorn(workdir, port, workers=2, threads=4):
+    """Starts `gunicorn app:server` with workdir as its data directory. Returns the process."""
+    if shutil.which("gunicorn") is None:
+        raise RuntimeError("gunicorn is not installed (pip install gunicorn), or use --url to target a running server.")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+    for var in ('EDUSENSE_STORE', 'EDUSENSE_REQUIRE_LOGIN'):
+        env.pop(var, None)
+    # Every worker must accept the same session cookies
+    env.setdefault('EDUSENSE_SECRET_KEY', 'load-test')
+    cmd = ["gunicorn", "app:server", "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+           "--worker-class", "gthread", "--threads", str(threads), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=workdir, env=env)
+
+def prepare_roster(workdir, students, seed=0):
+    """
+    Writes a synthetic roster into workdir/data and seeds the SQLite store from it
+    before the workers start. Returns [(StudentID, name)].
+    """
+    from bench.synth import generate_cohort
+
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    # Profile pages read the resource catalog from data/ as well
+    shutil.copy(os.path.join(REPO_DIR, "data", "resources.json"), os.path.join(workdir, "data"))
+    df = generate_cohort(students, seed)
+    df.to_csv(os.path.join(workdir, "data", "students.csv"), index=False)
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    env.pop('EDUSENSE_STORE', None)
+    subprocess.run([sys.executable, "-c", "from models.student_store import get_store; get_store()"],
+                   cwd=workdir, env=env, check=True)
+    return list(zip(df['StudentID'], df['Student']))
+
+def roster_students(path):
+    import pandas as pd
+    df = pd.read_csv(path, usecols=['StudentID', 'Student'], dtype=str).dropna()
+    return list(zip(df['StudentID'], df['Student']))
+
+def print_report(report, elapsed, users, mix):
+    print(f"\n{users} users, {elapsed:.0f}s measured, mix {', '.join(f'{a}={w:g}' for a, w in mix.items())}")
+    print(f"{'callback':<20} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'KB/resp':>8}")
+    total = 0
+    for name, r in report.items():
+        total += r['requests']
+        print(f"{name:<20} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.1f} "
+              f"{r['p50'] * 1e3:>9.1f} {r['p95'] * 1e3:>9.1f} {r['p99'] * 1e3:>9.1f} {r['bytes_per_response'] / 1024:>8.1f}")
+    print(f"{'total':<20} {total:>9} {'':>7} {total / elapsed if elapsed else 0:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the EduSense Dash callbacks.")
+    parser.add_argument('--url', help="target a running server instead of starting gunicorn")
+    parser.add_argument('--roster', default=os.path.join("data", "students.csv"),
+                        help="CSV with the StudentIDs and names of the --url server's roster")
+    parser.add_argument('--students', type=int, default=10_000, help="synthetic roster size for the local server")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30.0, help="measured seconds")
+    parser.add_argument('--warmup', type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument('--think-time', type=float, default=0.0, help="mean pause between a user's requests (s)")
+    parser.add_argument('--mix', default='browse', help=f"{', '.join(MIXES)} or action=weight,... "
+                                                        f"over {', '.join(REQUESTS)}")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--port', type=int, default=8051)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server, workdir = None, None
+    try:
+        if args.url:
+            base_url = args.url
+            students = roster_students(args.roster)
+        else:
+            workdir = tempfile.mkdtemp(prefix="edusense-load-")
+            print(f"Preparing {args.students} students in {workdir}...", file=sys.stderr)
+            students = prepare_roster(workdir, args.students, args.seed)
+            base_url = f"http://127.0.0.1:{args.port}/"
+            server = start_gunicorn(workdir, args.port, args.workers, args.threads)
+        wait_until_ready(base_url, proc=server)
+
+        print(f"Running {args.users} users against {base_url} for {args.warmup:g}s + {args.duration:g}s...", file=sys.stderr)
+        recorder, elapsed = run_load(base_url, students, mix, args.users, args.duration, args.warmup,
+                                     args.think_time, args.seed)
+        report = summarize(recorder, elapsed)
+        print_report(report, elapsed, args.users, mix)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'users': args.users, 'duration': elapsed, 'mix': mix, 'callbacks': report}, f, indent=2)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
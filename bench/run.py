@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks for the hot paths at 10k, 100k and 1M students.
+
+Each cohort size runs in its own worker process, inside a scratch directory
+whose data/students.csv is a synthetic roster (bench.synth), so the store,
+cohort cache and model singletons start cold and the repo's data/ is never
+touched. Every benchmark is repeated and its best time per operation is
+compared with bench/baselines.json; a result slower than the baseline by
+more than the tolerance counts as a regression and the run exits with 1.
+
+    python -m bench.run                          # all sizes, compare with baselines
+    python -m bench.run --sizes 10000 --only load_data update_dashboard
+    python -m bench.run --update-baselines       # record the current numbers
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES_PATH = os.path.join(REPO_DIR, "bench", "baselines.json")
+SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.25
+SEED = 0
+# Per-row functions are timed over this many students
+SAMPLE_ROWS = 200
+# LDA does not finish in reasonable time on a million remarks; topics are fitted on the first TOPIC_DOCS
+TOPIC_DOCS = 5_000
+PDF_STUDENTS = 500
+TRAIN_ROWS = 5_000
+
+class Case:
+    """What a benchmark times: run() repeated `repeat` times, with before() untimed ahead of each run."""
+    def __init__(self, run, before=None, ops=1, repeat=5):
+        self.run = run
+        self.before = before
+        self.ops = ops
+        self.repeat = repeat
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Registers a setup function env -> Case under name. Setup time is not measured."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+# --- Benchmarks ---
+@benchmark("load_data")
+def _load_data(env):
+    from dash_app import load_data
+    return Case(load_data, repeat=3)
+
+@benchmark("load_data_csv")
+def _load_data_csv(env):
+    from models.student_store import CSVStudentStore
+    return Case(CSVStudentStore().load, repeat=3)
+
+@benchmark("update_dashboard_cold")
+def _update_dashboard_cold(env):
+    # A write from another process: the cohort cache reloads and re-aggregates the roster
+    from models.student_store import get_store
+    record = env['df'].iloc[0].to_dict()
+    def before():
+        record['Attendance'] = 100.0 - record['Attendance']
+        get_store().upsert(record)
+    return Case(lambda: _post_update_dashboard(env), before=before, repeat=3)
+
+@benchmark("update_dashboard_after_edit")
+def _update_dashboard_after_edit(env):
+    # An edit saved through the app: the cache patches its frame and aggregates in place
+    from models.cohort_cache import get_cohort
+    record = env['df'].iloc[1].to_dict()
+    _post_update_dashboard(env)
+    def before():
+        record['Attendance'] = 100.0 - record['Attendance']
+        get_cohort().upsert(record)
+    return Case(lambda: _post_update_dashboard(env), before=before, repeat=5)
+
+@benchmark("update_dashboard")
+def _update_dashboard(env):
+    _post_update_dashboard(env)
+    return Case(lambda: _post_update_dashboard(env), repeat=20)
+
+@benchmark("nlp_feedback")
+def _nlp_feedback(env):
+    from models.nlp_feedback import nlp_feedback
+    rows = [row for _, row in env['sample'].iterrows()]
+    return Case(lambda: [nlp_feedback(row) for row in rows], ops=len(rows), repeat=3)
+
+@benchmark("nlp_feedback_batch")
+def _nlp_feedback_batch(env):
+    from models.nlp_feedback import nlp_feedback_batch
+    return Case(lambda: nlp_feedback_batch(env['df']), repeat=3)
+
+@benchmark("predict_risk")
+def _predict_risk(env):
+    from models.risk_predict import predict_risk
+    clf = _risk_model(env)
+    rows = [row for _, row in env['sample'].iterrows()]
+    return Case(lambda: [predict_risk(row, clf) for row in rows], ops=len(rows), repeat=3)
+
+@benchmark("predict_risk_batch")
+def _predict_risk_batch(env):
+    from models.risk_predict import predict_risk_batch
+    clf = _risk_model(env)
+    return Case(lambda: predict_risk_batch(env['df'], clf), repeat=3)
+
+@benchmark("get_topics")
+def _get_topics(env):
+    from models import topic_model
+    docs = env['df']['Remarks'].iloc[:env['topic_docs']].tolist()
+    return Case(lambda: topic_model.get_topics(docs), before=topic_model.get_topic_service().clear, repeat=2)
+
+@benchmark("get_topics_cached")
+def _get_topics_cached(env):
+    from models import topic_model
+    docs = env['df']['Remarks'].iloc[:env['topic_docs']].tolist()
+    topic_model.get_topics(docs)
+    return Case(lambda: topic_model.get_topics(docs), repeat=10)
+
+@benchmark("save_pdf")
+def _save_pdf(env):
+    from models.nlp_feedback import nlp_feedback_batch
+    from models.report_export import write_feedback_pdf
+    students = env['df'].iloc[:PDF_STUDENTS]
+    feedback = {name: fb[0] for name, fb in zip(students['Student'], nlp_feedback_batch(students))}
+    return Case(lambda: write_feedback_pdf(feedback, io.BytesIO()), ops=len(feedback), repeat=3)
+
+def _risk_model(env):
+    if 'clf' not in env:
+        from models.risk_predict import FEATURES, fit_risk_model, risk_labels
+        X = env['df'][FEATURES].iloc[:TRAIN_ROWS]
+        env['clf'] = fit_risk_model(X, risk_labels(X))
+    return env['clf']
+
+def _post_update_dashboard(env):
+    output = "..kpi-cards-row.children...subject-avg-chart.figure...performance-dist-chart.figure.."
+    body = {
+        "output": output,
+        "outputs": [{"id": o.rsplit('.', 1)[0], "property": o.rsplit('.', 1)[1]} for o in output.strip('.').split('...')],
+        "inputs": [{"id": "student-data-store", "property": "data", "value": {"version": "0"}}],
+        "changedPropIds": ["student-data-store.data"],
+        "state": [],
+    }
+    response = env['client'].post('/_dash-update-component', json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"update_dashboard returned HTTP {response.status_code}")
+    return response
+
+# --- Worker (one cohort size per process) ---
+def run_worker(size, names, seed=SEED, topic_docs=TOPIC_DOCS):
+    """Runs the named benchmarks against a synthetic roster in the current directory; returns {name: result}."""
+    import warnings
+    from bench.synth import generate_cohort
+
+    # predict_risk passes a bare array to a model fitted on a frame; sklearn warns on every call
+    warnings.filterwarnings('ignore', message="X does not have valid feature names")
+    os.makedirs("data", exist_ok=True)
+    df = generate_cohort(size, seed)
+    df.to_csv(os.path.join("data", "students.csv"), index=False)
+
+    from app import server
+    from models.student_store import get_store
+    t0 = time.perf_counter()
+    get_store()
+    print(f"  seeded SQLite store with {size} students in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    env = {'df': df, 'sample': df.iloc[:SAMPLE_ROWS], 'client': server.test_client(), 'topic_docs': topic_docs}
+    results = {}
+    for name in names:
+        case = BENCHMARKS[name](env)
+        times = []
+        for _ in range(case.repeat):
+            if case.before:
+                case.before()
+            t0 = time.perf_counter()
+            case.run()
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        results[name] = {
+            'best': times[0] / case.ops,
+            'median': times[len(times) // 2] / case.ops,
+            'ops': case.ops,
+            'repeat': case.repeat,
+        }
+        print(f"  {name:<28} {_fmt(results[name]['best'])}", file=sys.stderr)
+    return results
+
+def run_size(size, names, seed=SEED, topic_docs=TOPIC_DOCS):
+    """Runs one cohort size in a fresh interpreter inside a scratch directory."""
+    with tempfile.TemporaryDirectory(prefix="edusense-bench-") as workdir:
+        out = os.path.join(workdir, "results.json")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+        env.pop('EDUSENSE_STORE', None)
+        cmd = [sys.executable, "-m", "bench.run", "--worker", "--sizes", str(size), "--seed", str(seed),
+               "--topic-docs", str(topic_docs), "--out", out, "--only", *names]
+        subprocess.run(cmd, cwd=workdir, env=env, check=True)
+        with open(out) as f:
+            return json.load(f)
+
+# --- Baselines ---
+def load_baselines(path=BASELINES_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'tolerance': DEFAULT_TOLERANCE, 'tolerances': {}, 'results': {}}
+
+def save_baselines(baselines, results, path=BASELINES_PATH):
+    """Merges results ({size: {name: result}}) into the baselines file; only best times are stored."""
+    for size, by_name in results.items():
+        baselines['results'].setdefault(str(size), {}).update(
+            {name: round(r['best'], 6) for name, r in by_name.items()}
+        )
+    baselines['recorded_on'] = {
+        'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+        'date': time.strftime("%Y-%m-%d"),
+    }
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(baselines, results):
+    """Returns [(size, name, best, baseline or None, ratio or None, regressed)]."""
+    rows = []
+    for size, by_name in results.items():
+        stored = baselines['results'].get(str(size), {})
+        for name, r in by_name.items():
+            base = stored.get(name)
+            tolerance = baselines.get('tolerances', {}).get(name, baselines.get('tolerance', DEFAULT_TOLERANCE))
+            ratio = r['best'] / base if base else None
+            rows.append((size, name, r['best'], base, ratio, ratio is not None and ratio > 1 + tolerance))
+    return rows
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.1f} us"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the EduSense micro-benchmarks against synthetic cohorts.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--topic-docs', type=int, default=TOPIC_DOCS)
+    parser.add_argument('--baselines', default=BASELINES_PATH)
+    parser.add_argument('--update-baselines', action='store_true', help="store these results as the new baselines")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        results = run_worker(args.sizes[0], args.only, args.seed, args.topic_docs)
+        with open(args.out, 'w') as f:
+            json.dump(results, f)
+        sys.exit(0)
+
+    results = {}
+    for size in args.sizes:
+        print(f"{size} students", file=sys.stderr)
+        results[size] = run_size(size, args.only, args.seed, args.topic_docs)
+
+    baselines = load_baselines(args.baselines)
+    regressions = 0
+    print(f"\n{'size':>9}  {'benchmark':<28} {'best/op':>11} {'baseline':>11}  change")
+    for size, name, best, base, ratio, regressed in compare(baselines, results):
+        change = "new" if ratio is None else f"{(ratio - 1) * 100:+.0f}%" + ("  REGRESSION" if regressed else "")
+        print(f"{size:>9}  {name:<28} {_fmt(best)} {_fmt(base) if base else '':>11}  {change}")
+        regressions += regressed
+
+    if args.update_baselines:
+        save_baselines(baselines, results, args.baselines)
+        print(f"\nBaselines written to {args.baselines}.")
+    elif regressions:
+        print(f"\n{regressions} benchmark(s) slower than their baseline beyond the tolerance.")
+        sys.exit(1)
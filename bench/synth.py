@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from models.student_store import COLUMNS, SUBJECTS
+
+FIRST_NAMES = [
+    "Aarav", "Abigail", "Aisha", "Alice", "Amir", "Ana", "Ben", "Bob", "Carlos", "Charlie", "Chloe", "Daniel",
+    "Diana", "Elena", "Ethan", "Fatima", "Grace", "Hana", "Hiro", "Isaac", "Isla", "Jack", "Jamal", "Julia",
+    "Kai", "Leah", "Liam", "Lucia", "Maya", "Mei", "Mohammed", "Nina", "Noah", "Olivia", "Omar", "Priya",
+    "Rafael", "Rosa", "Sam", "Sara", "Sofia", "Tariq", "Theo", "Uma", "Victor", "Wei", "Yara", "Zoe",
+]
+LAST_NAMES = [
+    "Adams", "Ahmed", "Brown", "Chen", "Costa", "Davis", "Dubois", "Evans", "Fischer", "Garcia", "Gupta",
+    "Hansen", "Ito", "Johnson", "Kim", "Kowalski", "Lee", "Lopez", "Martin", "Miller", "Moreau", "Nguyen",
+    "Novak", "Okafor", "Patel", "Rossi", "Santos", "Schmidt", "Silva", "Singh", "Smith", "Tanaka", "Taylor",
+    "Walker", "Williams", "Wilson", "Yilmaz", "Zhang",
+]
+
+# Remark fragments by performance band (strong, average, struggling)
+OPENERS = [
+    ["A very consistent and hardworking student.", "Consistently produces excellent work.",
+     "Loves class discussions and often helps classmates.", "Shows real curiosity and asks thoughtful questions."],
+    ["Generally attentive and completes assignments on time.", "Works steadily but could push further.",
+     "Participates when prompted.", "Making good progress this term."],
+    ["Struggles to keep up with the pace of the class.", "Often hands in incomplete homework.",
+     "Finds it hard to stay focused during lessons.", "Needs frequent reminders to stay on task."],
+]
+STRENGTH = [
+    "Excellent work in {subject}.", "Really enjoys {subject}.", "Shows a clear talent for {subject}.",
+    "{subject} projects are a highlight.",
+]
+WEAKNESS = [
+    "Struggles with {subject}.", "Needs extra support in {subject}.", "Should revise {subject} fundamentals.",
+    "Would benefit from tutoring in {subject}.",
+]
+ATTENDANCE = ["", "Attendance has been slipping.", "Frequently absent on Mondays.", "Late to class several times."]
+
+def generate_cohort(n, seed=0):
+    """
+    A deterministic synthetic roster of n students in the students.csv schema.
+    Scores are drawn around a per-student ability with subject offsets, so
+    subjects correlate the way real grades do; attendance tracks ability
+    loosely. Remarks are assembled from phrase banks that agree with the scores.
+    The same (n, seed) always gives the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(74, 12, n)
+    scores = np.clip(ability[:, None] + rng.normal(0, 8, (n, len(SUBJECTS))), 0, 100).round()
+    attendance = np.clip(88 + 0.4 * (ability - 74) + rng.normal(0, 7, n), 30, 100).round()
+
+    avg = scores.mean(axis=1)
+    band = np.where(avg >= 80, 0, np.where(avg >= 65, 1, 2))
+    opener = rng.integers(0, len(OPENERS[0]), n)
+    strength = rng.integers(0, len(STRENGTH), n)
+    weakness = rng.integers(0, len(WEAKNESS), n)
+    absence = np.where(attendance < 80, rng.integers(1, len(ATTENDANCE), n), 0)
+    top, weak = scores.argmax(axis=1), scores.argmin(axis=1)
+    mention_weak = scores[np.arange(n), weak] < 70
+
+    remarks = []
+    for i in range(n):
+        parts = [OPENERS[band[i]][opener[i]], STRENGTH[strength[i]].format(subject=SUBJECTS[top[i]])]
+        if mention_weak[i]:
+            parts.append(WEAKNESS[weakness[i]].format(subject=SUBJECTS[weak[i]]))
+        if absence[i]:
+            parts.append(ATTENDANCE[absence[i]])
+        remarks.append(" ".join(parts))
+
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), n)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), n)]
+    df = pd.DataFrame({
+        'StudentID': [f"ST-{i:07d}" for i in range(1, n + 1)],
+        'Student': np.char.add(np.char.add(first, " "), last),
+    })
+    for j, subject in enumerate(SUBJECTS):
+        df[subject] = scores[:, j]
+    df['Attendance'] = attendance
+    df['Remarks'] = remarks
+    df['PhotoURL'] = ''
+    return df[COLUMNS]
+
+def write_cohort(path, n, seed=0):
+    generate_cohort(n, seed).to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic student roster in the students.csv schema.")
+    parser.add_argument('n', type=int, help="number of students")
+    parser.add_argument('path', nargs='?', default="students_synthetic.csv")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_cohort(args.path, args.n, args.seed)
+    print(f"Wrote {args.n} students to {args.path}.")
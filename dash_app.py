@@ -2,43 +2,36 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output, State, callback, dash_table
+from dash import Dash, dcc, html, Input, Output, State, callback, ctx, dash_table
 
 import dash_bootstrap_components as dbc
 
 # Import functions from model files
 from models.nlp_feedback import nlp_feedback
-from models.recommend import recommend_resources
+from models.recommend import cohort_recommendations, rank_resources
+from models.student_store import get_store
+from models.cohort_cache import get_cohort
+from models.roster_index import RosterIndex
+from models.lru_cache import LRUCache
+from models.figure_cache import FigureCache
+from models.metrics import register_cache
+from web_metrics import timed_callback
 
 # --- Constants ---
-DATA_PATH = "data/students.csv"
 DEFAULT_THEME = dbc.themes.CYBORG
 SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+PROFILE_CACHE_SIZE = 256
+FIGURE_CACHE_SIZE = 1024
 
 # --- Helper Functions ---
 def load_data():
-    """Load student data from CSV, handle missing file and columns."""
-    try:
-        df = pd.read_csv(DATA_PATH)
-        all_cols = ['StudentID', 'Student'] + SUBJECTS + ['Attendance', 'Remarks', 'PhotoURL']
-        for col in all_cols:
-            if col not in df.columns:
-                df[col] = '' if col in ['Remarks', 'PhotoURL', 'Student', 'StudentID'] else 0
-        
-        df['Remarks'] = df['Remarks'].fillna('')
-        df['PhotoURL'] = df['PhotoURL'].fillna('')
-        df.fillna(0, inplace=True)
-
-        df[SUBJECTS + ['Attendance']] = df[SUBJECTS + ['Attendance']].astype(float)
-        df['StudentID'] = df['StudentID'].astype(str)
-    except FileNotFoundError:
-        df = pd.DataFrame(columns=['StudentID', 'Student'] + SUBJECTS + ['Attendance', 'Remarks', 'PhotoURL'])
-    return df
+    """Load the student roster from the configured store (SQLite or CSV)."""
+    return get_store().load()
 
 def save_data(df):
-    """Save DataFrame to CSV."""
-    df.to_csv(DATA_PATH, index=False)
-    
+    """Replace the whole roster in the configured store."""
+    get_store().save(df)
+
 # --- Main App Creation ---
 def create_dashboard(server):
     app = Dash(
@@ -49,13 +42,24 @@ def create_dashboard(server):
         suppress_callback_exceptions=True,
     )
 
+    # Rendered profile pages, keyed by (student id, data version)
+    profile_cache = LRUCache(maxsize=PROFILE_CACHE_SIZE)
+    # Serialized Plotly figures, keyed by (figure kind, student id or 'cohort', data version)
+    figure_cache = FigureCache(maxsize=FIGURE_CACHE_SIZE)
+    register_cache('profile', profile_cache)
+    register_cache('figure', figure_cache)
+
     # --- App Layout ---
-    app.layout = dbc.Container([
-        dcc.Store(id='student-data-store', data=load_data().to_dict('records')),
-        dbc.NavbarSimple(brand="EduSense AI Dashboard", color="primary", dark=True, className="mb-4"),
-        dcc.Location(id='url', refresh=False),
-        html.Div(id='page-content')
-    ], fluid=True, className="dbc")
+    # The browser store only carries the data version; the roster itself stays in the server-side cohort cache.
+    def serve_layout():
+        return dbc.Container([
+            dcc.Store(id='student-data-store', data={'version': str(get_cohort().version())}),
+            dbc.NavbarSimple(brand="EduSense AI Dashboard", color="primary", dark=True, className="mb-4"),
+            dcc.Location(id='url', refresh=False),
+            html.Div(id='page-content')
+        ], fluid=True, className="dbc")
+
+    app.layout = serve_layout
     
     # --- Page Layout Functions ---
     def main_dashboard_layout():
@@ -68,6 +72,7 @@ def create_dashboard(server):
             dbc.Card([
                 dbc.CardHeader(dbc.Row([
                     dbc.Col(html.H4("Student Roster"), width="auto"),
+                    dbc.Col(dbc.Input(id='roster-search', type='search', placeholder="Search name or ID...", debounce=300)),
                     dbc.Col(dbc.Button("＋ Add New Student", href="/entry", color="success"), width="auto")
                 ], justify="between", align="center")),
                 dbc.CardBody(
@@ -78,11 +83,16 @@ def create_dashboard(server):
                             {'name': 'Student Name', 'id': 'StudentLink', 'type': 'text', 'presentation': 'markdown'},
                             {'name': 'Avg. Score', 'id': 'AvgScore'},
                             {'name': 'Attendance %', 'id': 'Attendance'},
+                            {'name': 'Risk %', 'id': 'RiskPct'},
+                            {'name': 'At Risk', 'id': 'AtRisk'},
                             {'name': 'Actions', 'id': 'Actions', 'type': 'text', 'presentation': 'markdown'}
                         ],
                         style_cell={'textAlign': 'left', 'backgroundColor': '#222', 'color': 'white', 'border': '1px solid #444'},
                         style_header={'fontWeight': 'bold', 'backgroundColor': '#333', 'border': '1px solid #444'},
-                        markdown_options={"html": True}, page_size=10,
+                        markdown_options={"html": True},
+                        page_action='custom', page_current=0, page_size=10,
+                        sort_action='custom', sort_mode='single', sort_by=[],
+                        filter_action='custom', filter_query='',
                     )
                 )
             ])
@@ -97,8 +107,9 @@ def create_dashboard(server):
         initial_values['attendance'] = None
 
         if student_id:
-            df = pd.DataFrame(load_data())
-            student_data = df[df['StudentID'] == student_id].iloc[0]
+            _, student_data = get_cohort().get(student_id)
+            if student_data is None:
+                return student_not_found(student_id)
             initial_values = {
                 'id': student_data['StudentID'], 'name': student_data['Student'],
                 'attendance': student_data['Attendance'], 'remarks': student_data['Remarks'], 'photo': student_data['PhotoURL']
@@ -135,15 +146,29 @@ def create_dashboard(server):
             ]))
         ])
 
+    def student_not_found(student_id):
+        return html.Div([
+            dbc.Button([html.I(className="bi bi-arrow-left"), " Back to Dashboard"], href="/", className="mb-3"),
+            dbc.Alert(f"No student with ID {student_id}.", color="warning")
+        ])
+
     def student_profile_layout(student_id):
-        df = pd.DataFrame(load_data())
-        student_data = df[df['StudentID'] == student_id].iloc[0]
-        
+        version, student_data = get_cohort().get(student_id)
+        if student_data is None:
+            return student_not_found(student_id)
+        return profile_cache.get_or_build((student_id, version), lambda: render_student_profile(student_id, student_data, version))
+
+    def render_student_profile(student_id, student_data, version):
         scores = student_data[SUBJECTS]
         avg_score = scores.mean()
         weakest_subject = scores.idxmin() if scores.sum() > 0 else "N/A"
         best_subject = scores.idxmax() if scores.sum() > 0 else "N/A"
-        recommendations = recommend_resources(weakest_subject) if weakest_subject != "N/A" else None
+        # Ranked across every weak subject in the cohort-wide batch; a student the batch
+        # has not seen yet (the roster moved on meanwhile) is ranked on its own
+        if weakest_subject != "N/A":
+            recommendations = cohort_recommendations().get(student_id) or rank_resources(student_data)
+        else:
+            recommendations = None
         _, _, structured_feedback = nlp_feedback(student_data)
         
         photo_url = student_data['PhotoURL'] if pd.notna(student_data['PhotoURL']) and student_data['PhotoURL'] else 'https://placehold.co/150x150/2a3a49/6c757d?text=No+Image'
@@ -168,21 +193,30 @@ def create_dashboard(server):
             ]
 
         # --- Create Radar Chart ---
-        radar_fig = go.Figure()
-        radar_fig.add_trace(go.Scatterpolar(
-            r=list(scores.values) + [scores.values[0]], # Add first value to end to close the shape
-            theta=list(scores.index) + [scores.index[0]], # Add first label to end
-            fill='toself',
-            name='Scores'
-        ))
-        radar_fig.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-            showlegend=False,
-            template="plotly_dark",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            title="Skills Profile"
-        )
+        def build_radar_fig():
+            radar_fig = go.Figure()
+            radar_fig.add_trace(go.Scatterpolar(
+                r=list(scores.values) + [scores.values[0]], # Add first value to end to close the shape
+                theta=list(scores.index) + [scores.index[0]], # Add first label to end
+                fill='toself',
+                name='Scores'
+            ))
+            radar_fig.update_layout(
+                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+                showlegend=False,
+                template="plotly_dark",
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                title="Skills Profile"
+            )
+            return radar_fig
+
+        def build_scores_fig():
+            return px.bar(x=scores.index, y=scores.values, labels={'x': 'Subject', 'y': 'Score'}, text=scores.values, template="plotly_dark") \
+                .update_layout(showlegend=False, margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+
+        radar_fig = figure_cache.figure('radar', student_id, version, build_radar_fig)
+        scores_fig = figure_cache.figure('score-breakdown', student_id, version, build_scores_fig)
 
         return html.Div([
             dbc.Row([
@@ -214,10 +248,7 @@ def create_dashboard(server):
                         dbc.Col(dbc.Card(dcc.Graph(figure=radar_fig)), md=5, className="mt-4"),
                         dbc.Col(dbc.Card([
                             dbc.CardHeader("Score Breakdown"),
-                            dbc.CardBody(dcc.Graph(
-                                figure=px.bar(x=scores.index, y=scores.values, labels={'x': 'Subject', 'y': 'Score'}, text=scores.values, template="plotly_dark")
-                                    .update_layout(showlegend=False, margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-                            ))
+                            dbc.CardBody(dcc.Graph(figure=scores_fig))
                         ]), md=7, className="mt-4"),
                     ])
                 ]),
@@ -240,7 +271,7 @@ def create_dashboard(server):
                 ]),
                 dbc.Tab(label="Learning Resources", children=[
                      dbc.Card(dbc.CardBody([
-                        html.H4(f"Recommended Resources for {weakest_subject}", className="mb-4"),
+                        html.H4(f"Recommended Resources for {', '.join(recommendations['subjects'])}" if recommendations else "Recommended Resources", className="mb-4"),
                         dbc.Row([
                             dbc.Col([
                                 dbc.Card([
@@ -288,6 +319,7 @@ def create_dashboard(server):
 
     # --- Callbacks ---
     @app.callback(Output('page-content', 'children'), Input('url', 'pathname'))
+    @timed_callback
     def display_page(pathname):
         if pathname == '/entry': return data_entry_page()
         if pathname and pathname.startswith('/entry/'): return data_entry_page(student_id=pathname.split('/')[-1])
@@ -298,38 +330,62 @@ def create_dashboard(server):
         Output('kpi-cards-row', 'children'),
         Output('subject-avg-chart', 'figure'),
         Output('performance-dist-chart', 'figure'),
-        Output('student-roster-table', 'data'),
         Input('student-data-store', 'data')
     )
+    @timed_callback
     def update_dashboard(data):
-        if not data: return [], {}, {}, []
-        
-        df = pd.DataFrame(data)
-        df['AvgScore'] = df[SUBJECTS].mean(axis=1).round(1)
+        # KPIs and charts come from running aggregates that the cohort cache updates on every write
+        version, stats = get_cohort().aggregates()
+        if not stats.count: return [], {}, {}
 
         kpi_cards = dbc.Row([
-            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-people-fill me-2"), "Total Students"]), dbc.CardBody(f"{len(df)}", className="fs-3 fw-bold")])),
-            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-star-fill me-2"), "Class Average Score"]), dbc.CardBody(f"{df['AvgScore'].mean():.1f}", className="fs-3 fw-bold")])),
-            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-check-circle-fill me-2"), "Average Attendance"]), dbc.CardBody(f"{df['Attendance'].mean():.1f}%", className="fs-3 fw-bold")])),
+            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-people-fill me-2"), "Total Students"]), dbc.CardBody(f"{stats.count}", className="fs-3 fw-bold")])),
+            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-star-fill me-2"), "Class Average Score"]), dbc.CardBody(f"{stats.class_avg_score():.1f}", className="fs-3 fw-bold")])),
+            dbc.Col(dbc.Card([dbc.CardHeader([html.I(className="bi bi-check-circle-fill me-2"), "Average Attendance"]), dbc.CardBody(f"{stats.avg_attendance():.1f}%", className="fs-3 fw-bold")])),
         ])
         
-        subject_avgs = df[SUBJECTS].mean().reset_index()
-        subject_avgs.columns = ['Subject', 'Average Score']
-        fig_subjects = px.bar(subject_avgs, x='Subject', y='Average Score', title='Class Average by Subject', text_auto='.1f', template='plotly_dark')
-        fig_subjects.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-
-        bins = [0, 60, 70, 80, 90, 101]
-        labels = ['Poor (<60)', 'Needs Improvement (60-69)', 'Average (70-79)', 'Good (80-89)', 'Excellent (90+)']
-        df['Performance Tier'] = pd.cut(df['AvgScore'], right=False, bins=bins, labels=labels)
-        tier_counts = df['Performance Tier'].value_counts(sort=False).reset_index()
-        fig_performance = px.pie(tier_counts, values='count', names='Performance Tier', title='Class Performance Distribution', hole=0.4, template='plotly_dark')
-        fig_performance.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        
-        df['StudentLink'] = df.apply(lambda row: f"[{row['Student']}](/profile/{row['StudentID']})", axis=1)
-        df['Actions'] = df.apply(lambda row: f'<a href="/entry/{row["StudentID"]}" class="btn btn-sm btn-outline-secondary ms-1">Edit</a>', axis=1)
-        table_data = df.to_dict('records')
+        def build_subjects_fig():
+            subject_avgs = pd.DataFrame(list(stats.subject_averages().items()), columns=['Subject', 'Average Score'])
+            fig_subjects = px.bar(subject_avgs, x='Subject', y='Average Score', title='Class Average by Subject', text_auto='.1f', template='plotly_dark')
+            return fig_subjects.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
 
-        return kpi_cards, fig_subjects, fig_performance, table_data
+        def build_performance_fig():
+            tier_counts = pd.DataFrame(list(stats.tiers().items()), columns=['Performance Tier', 'count'])
+            fig_performance = px.pie(tier_counts, values='count', names='Performance Tier', title='Class Performance Distribution', hole=0.4, template='plotly_dark')
+            return fig_performance.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+
+        fig_subjects = figure_cache.figure('subject-avg', 'cohort', version, build_subjects_fig)
+        fig_performance = figure_cache.figure('performance-dist', 'cohort', version, build_performance_fig)
+
+        return kpi_cards, fig_subjects, fig_performance
+
+    @app.callback(
+        Output('student-roster-table', 'data'),
+        Output('student-roster-table', 'page_count'),
+        Output('student-roster-table', 'page_current'),
+        Input('student-data-store', 'data'),
+        Input('student-roster-table', 'page_current'),
+        Input('student-roster-table', 'page_size'),
+        Input('student-roster-table', 'sort_by'),
+        Input('student-roster-table', 'filter_query'),
+        Input('roster-search', 'value')
+    )
+    @timed_callback
+    def update_roster_page(data, page_current, page_size, sort_by, filter_query, search):
+        # Only the visible page is formatted and sent; sorting uses indexes prebuilt per data version
+        cohort = get_cohort()
+        roster = cohort.derived('roster-index', lambda df: RosterIndex(df, get_store().load_risk()))
+        # A new search, filter or sort order starts again from the first page
+        if ctx.triggered_id == 'roster-search' or {'student-roster-table.sort_by', 'student-roster-table.filter_query'} & set(ctx.triggered_prop_ids):
+            page_current = 0
+        _, student_ids = cohort.search(search or '')
+        rows, page_count, page_current = roster.page(page_current, page_size, sort_by, filter_query, student_ids)
+
+        rows = rows[['StudentID', 'Student', 'AvgScore', 'Attendance', 'RiskPct', 'AtRisk']].copy()
+        rows['AtRisk'] = rows['AtRisk'].map({1.0: 'Yes', 0.0: 'No'}).fillna('')
+        rows['StudentLink'] = '[' + rows['Student'] + '](/profile/' + rows['StudentID'] + ')'
+        rows['Actions'] = '<a href="/entry/' + rows['StudentID'] + '" class="btn btn-sm btn-outline-secondary ms-1">Edit</a>'
+        return rows.to_dict('records'), page_count, page_current
 
     @app.callback(
         Output('url', 'pathname'),
@@ -341,9 +397,10 @@ def create_dashboard(server):
         + [State('entry-attendance', 'value'), State('entry-remarks', 'value'), State('entry-photo-url', 'value')],
         prevent_initial_call=True
     )
+    @timed_callback
     def save_student_data(n_clicks, pathname, data, student_id, name, *args):
-        df = pd.DataFrame(data)
-        
+        cohort = get_cohort()
+
         form_values = list(args)
         scores = form_values[:len(SUBJECTS)]
         attendance, remarks, photo_url = form_values[len(SUBJECTS):]
@@ -353,15 +410,11 @@ def create_dashboard(server):
             new_data[subject] = float(scores[i] or 0)
 
         if pathname == '/entry':
-            if student_id in df['StudentID'].values: return '/entry', data
-            df = pd.concat([df, pd.DataFrame([new_data])], ignore_index=True)
+            if student_id in cohort: return '/entry', data
         else:
-            edit_student_id = pathname.split('/')[-1]
-            idx = df[df['StudentID'] == edit_student_id].index[0]
-            for key, value in new_data.items():
-                df.loc[idx, key] = value
+            new_data['StudentID'] = pathname.split('/')[-1]
 
-        save_data(df)
-        return '/', df.to_dict('records')
+        version = cohort.upsert(new_data)
+        return '/', {'version': str(version)}
 
     return app
\ No newline at end of file
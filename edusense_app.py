@@ -1,101 +1,81 @@
+import time
+_STARTUP_T0 = time.perf_counter()
+
 import os
-import pickle
+import sys
 import pandas as pd
 import tkinter as tk
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import filedialog, messagebox
-from transformers import pipeline
-from textblob import TextBlob
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+from gui.lazy import lazy_import, lazy_modules, BackgroundLoader, IMPORT_TIMES
+from gui.feedback_jobs import FeedbackJobQueue
+from gui.virtual_tree import VirtualTree
+from gui.notifier import notify_at_risk
+from models.risk_predict import predict_risk_batch, load_risk_model
+from models.registry import REGISTRY_DIR
+from models.risk_trainer import LiveRiskModel, RiskTrainingJob
+from models.student_store import get_store
+from models.search_index import SearchIndex
+from models.recommend import recommend_batch, SUBJECTS
+from models.report_export import write_feedback_pdf, ReportExportJob
+from models.feedback_store import get_feedback_store, DB_PATH as FEEDBACK_STORE
+
+# Heavy libraries are imported on first use so the window can open first
+transformers = lazy_import("transformers")
+textblob = lazy_import("textblob")
+topic_model = lazy_import("models.topic_model")
+plt = lazy_import("matplotlib.pyplot")
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+
+_EAGER_IMPORTS_SECONDS = time.perf_counter() - _STARTUP_T0
 
 # --- Constants & Globals ---
 DATA_FILE = "data/students.csv"
-FEEDBACK_STORE = "data/manual_feedback.pkl"
-RISK_MODEL_FILE = "models/risk_model.pkl"
-
-# Load or init manual feedback storage
-if os.path.exists(FEEDBACK_STORE):
-    with open(FEEDBACK_STORE, "rb") as f:
-        manual_feedback = pickle.load(f)
-else:
-    manual_feedback = {}
+FEEDBACK_TARGETS = ["Selected", "All", "At-Risk"]
+TABLE_COLUMNS = ["Name", "Math", "Science", "English", "Attendance", "Remarks"]
+SEARCH_DEBOUNCE_MS = 250
+NAME_SUGGESTIONS = 50
 
 # --- Helper functions ---
 def load_csv(path=DATA_FILE):
     df = pd.read_csv(path)
     df['Name'] = df['Student']
+    return attach_cached_risk(df)
+
+def attach_cached_risk(df):
+    """Join the persisted risk scores so flags show up without re-scoring."""
+    if 'StudentID' not in df.columns:
+        return df
+    risk = get_store().load_risk().set_index('StudentID')
+    ids = df['StudentID'].astype(str)
+    df['RiskProb'] = ids.map(risk['RiskProb'])
+    df['AtRisk'] = ids.map(risk['AtRisk'])
     return df
 
+def student_keys(df):
+    """Feedback store keys for df's rows: the StudentID, or the name for rosters without IDs."""
+    return (df['StudentID'] if 'StudentID' in df.columns else df['Name']).astype(str)
+
 def save_csv(df, path):
     df.to_csv(path, index=False)
 
 def save_pdf(feedback_dict, path):
-    c = canvas.Canvas(path, pagesize=letter)
-    w, h = letter
-    c.setFont("Helvetica", 16)
-    y = h - 40
-    c.drawString(40, y, "EduSense: Personalized Feedback")
-    y -= 40
-    for name, fb in feedback_dict.items():
-        if y < 80:
-            c.showPage()
-            y = h - 40
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(40, y, name)
-        y -= 20
-        c.setFont("Helvetica", 12)
-        for line in fb.split("\n"):
-            c.drawString(60, y, line)
-            y -= 16
-        y -= 12
-    c.save()
+    write_feedback_pdf(feedback_dict, path)
 
 def nlp_feedback(row):
     avg = (row['Math'] + row['Science'] + row['English']) / 3
     base = ("Excellent!" if avg >= 85 else "Good" if avg >= 70 else "Needs Improvement")
-    tb_sent = TextBlob(row.get('Remarks', '')).sentiment
+    tb_sent = textblob.TextBlob(row.get('Remarks', '')).sentiment
     return {
         "feedback": f"{base} Polarity:{tb_sent.polarity:.2f}, Subj:{tb_sent.subjectivity:.2f}",
         "polarity": tb_sent.polarity,
         "subjectivity": tb_sent.subjectivity
     }
 
-def recommend_resources(row):
-    areas = [s for s in ["Math", "Science", "English"] if row[s] < 70]
-    links = {
-        "Math": "https://www.khanacademy.org/math",
-        "Science": "https://www.sciencebuddies.org/",
-        "English": "https://www.grammarly.com/"
-    }
-    return [(a, links[a]) for a in areas]
-
-def train_risk_model(df, thresh_avg, thresh_att):
-    X = df[["Math", "Science", "English", "Attendance"]]
-    y = (((X[["Math", "Science", "English"]].mean(axis=1) < thresh_avg) |
-          (X["Attendance"] < thresh_att))).astype(int)
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X, y)
-    os.makedirs(os.path.dirname(RISK_MODEL_FILE), exist_ok=True)
-    pickle.dump(clf, open(RISK_MODEL_FILE, "wb"))
-    return clf
-
-def predict_risk(row, clf):
-    return bool(clf.predict([[row['Math'], row['Science'], row['English'], row['Attendance']]])[0])
-
 def get_topics(docs, n=3):
-    vec = CountVectorizer(stop_words='english')
-    X = vec.fit_transform(docs)
-    lda = LatentDirichletAllocation(n_components=n, random_state=42)
-    lda.fit(X)
-    words = vec.get_feature_names_out()
-    return [", ".join([words[i] for i in topic.argsort()[:-6:-1]]) for topic in lda.components_]
+    # Shared, cached topic service; returns "Topic i: ..." lines or a single message if there is too little text
+    return topic_model.get_topics(docs, n)
 
 # --- Main Application ---
 class EduSenseApp:
@@ -104,12 +84,19 @@ class EduSenseApp:
         self.root.geometry("1100x750")
         self.df = load_csv()
         self.filtered = self.df.copy()
-        self.risk_clf = None
-
-        try:
-            self.ai_gen = pipeline("text-generation", model="distilgpt2")
-        except:
-            self.ai_gen = None
+        self._build_search_index()
+        self._debounced = {}
+        self.risk_model = LiveRiskModel()
+        self.train_job = None
+        self.feedback = get_feedback_store()
+        self.export_job = None
+
+        # Warm up the generation pipeline and the risk model while the UI is already usable
+        self.ai_loader = BackgroundLoader("ai-pipeline", lambda: transformers.pipeline("text-generation", model="distilgpt2"))
+        self.risk_loader = BackgroundLoader("risk-model", self._load_risk_model)
+        self.fb_jobs = FeedbackJobQueue(self.ai_loader.get)
+        self.fb_job = None
+        self.recommendations = None
 
         self._build_menu()
         self.status = tb.Label(self.root, bootstyle="secondary", anchor=W)
@@ -129,6 +116,13 @@ class EduSenseApp:
 
         self.update_status("Ready.")
 
+    def _load_risk_model(self):
+        clf = load_risk_model()
+        # Don't replace a model that finished training while we were loading
+        if self.risk_model.get() is None:
+            self.risk_model.swap(clf)
+        return clf
+
     def _build_menu(self):
         menubar = tk.Menu(self.root)
         filem = tk.Menu(menubar, tearoff=0)
@@ -155,6 +149,9 @@ class EduSenseApp:
         try:
             self.df = load_csv(path)
             self.filtered = self.df.copy()
+            self.recommendations = None
+            self._build_search_index()
+            self.sel_fb['values'] = list(self.df['Name'][:NAME_SUGGESTIONS])
             self._refresh_table()
             self.update_status(f"Loaded {os.path.basename(path)}")
         except Exception as e:
@@ -176,40 +173,49 @@ class EduSenseApp:
         tb.Label(fl, text="🔍 Search:").pack(side=LEFT, padx=5)
         self.search_var = tk.StringVar()
         tb.Entry(fl, textvariable=self.search_var).pack(side=LEFT, fill=X, expand=1, padx=5)
+        # Search as you type, once typing pauses
+        self.search_var.trace_add("write", lambda *_: self._debounce(self._apply_filter))
         tb.Button(fl, text="Go", bootstyle="success-outline", command=self._apply_filter).pack(side=LEFT)
 
         tbl_frame = tb.Frame(tab)
         tbl_frame.pack(fill=BOTH, expand=1, padx=5, pady=5)
         vsb = tb.Scrollbar(tbl_frame, orient=VERTICAL)
         vsb.pack(side=RIGHT, fill=Y)
-        self.tree = tb.Treeview(
-            tbl_frame,
-            columns=["Name","Math","Science","English","Attendance","Remarks"],
-            show="headings", height=15,
-            yscrollcommand=vsb.set
-        )
-        vsb.config(command=self.tree.yview)
+        self.tree = tb.Treeview(tbl_frame, columns=TABLE_COLUMNS, show="headings", height=15)
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120, anchor=CENTER)
         self.tree.pack(fill=BOTH, expand=1)
+        # Only the rows around the viewport are real Tk items; the scrollbar spans the whole frame
+        self.table = VirtualTree(self.tree, vsb, TABLE_COLUMNS)
         self._refresh_table()
 
     def _build_feedback_tab(self):
         tab = tb.Frame(self.nb); self.nb.add(tab, text="Feedback")
         panel = tb.Frame(tab); panel.pack(fill=X, pady=5)
         tb.Label(panel, text="👤 Student:").pack(side=LEFT, padx=5)
-        self.sel_fb = tb.Combobox(panel, values=list(self.df['Name']), bootstyle="info")
+        # The dropdown offers the best matches for what has been typed instead of every name
+        self.sel_fb = tb.Combobox(panel, values=list(self.df['Name'][:NAME_SUGGESTIONS]), bootstyle="info")
         self.sel_fb.current(0); self.sel_fb.pack(side=LEFT, padx=5)
+        self.sel_fb.bind("<KeyRelease>", lambda e: self._debounce(self._suggest_names))
         tb.Button(panel, text="Show", bootstyle="secondary", command=self._show_feedback).pack(side=LEFT, padx=5)
 
         self.fb_text = tk.Text(tab, height=8)
         self.fb_text.pack(fill=X, padx=5, pady=5)
 
-        btns = tb.Frame(tab); btns.pack(fill=X, pady=5)
-        self.progress = tb.Progressbar(btns, mode="indeterminate")
+        gen = tb.Frame(tab); gen.pack(fill=X, pady=5)
+        tb.Label(gen, text="AI Feedback for:").pack(side=LEFT, padx=5)
+        self.fb_target = tb.Combobox(gen, values=FEEDBACK_TARGETS, width=10, state="readonly")
+        self.fb_target.current(0); self.fb_target.pack(side=LEFT, padx=5)
+        tb.Button(gen, text="AI Feedback", bootstyle="warning", command=self._gen_ai_fb).pack(side=LEFT, padx=3)
+        tb.Button(gen, text="Cancel", bootstyle="secondary", command=self._cancel_ai_fb).pack(side=LEFT, padx=3)
+        tb.Button(gen, text="Resume", bootstyle="info", command=self._resume_ai_fb).pack(side=LEFT, padx=3)
+        self.progress = tb.Progressbar(gen, mode="determinate", maximum=100)
         self.progress.pack(fill=X, expand=1, side=LEFT, padx=5)
-        tb.Button(btns, text="AI Feedback", bootstyle="warning", command=self._gen_ai_fb).pack(side=LEFT, padx=3)
+        self.fb_eta = tb.Label(gen, text="", width=22)
+        self.fb_eta.pack(side=LEFT, padx=5)
+
+        btns = tb.Frame(tab); btns.pack(fill=X, pady=5)
         tb.Button(btns, text="Save Manual", bootstyle="success", command=self._save_manual_fb).pack(side=LEFT, padx=3)
         tb.Button(btns, text="Export PDF", bootstyle="danger", command=self._export_feedback_pdf).pack(side=LEFT, padx=3)
         tb.Button(btns, text="Export CSV", bootstyle="primary", command=self._export_feedback_csv).pack(side=LEFT, padx=3)
@@ -223,10 +229,18 @@ class EduSenseApp:
             font=("Arial",12,"bold"), bootstyle="info"
         ).pack(pady=5)
 
-        fig, ax = plt.subplots(figsize=(6,3))
-        self.df[["Math","Science","English"]].mean().plot.bar(ax=ax, color=["#4e79a7","#f28e2b","#e15759"])
-        ax.set_title("Subject Averages")
-        FigureCanvasTkAgg(fig, master=tab).get_tk_widget().pack()
+        # matplotlib is only imported once the tab is first opened
+        self.analytics_tab = tab
+        self.analytics_chart = None
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _on_tab_changed(self, event=None):
+        if self.analytics_chart is None and self.nb.select() == str(self.analytics_tab):
+            fig, ax = plt.subplots(figsize=(6,3))
+            self.df[["Math","Science","English"]].mean().plot.bar(ax=ax, color=["#4e79a7","#f28e2b","#e15759"])
+            ax.set_title("Subject Averages")
+            self.analytics_chart = backend_tkagg.FigureCanvasTkAgg(fig, master=self.analytics_tab)
+            self.analytics_chart.get_tk_widget().pack()
 
     def _build_risk_tab(self):
         tab = tb.Frame(self.nb); self.nb.add(tab, text="Risk")
@@ -238,10 +252,14 @@ class EduSenseApp:
         self.thresh_att = tk.DoubleVar(value=75)
         tb.Entry(frm, textvariable=self.thresh_att, width=6).grid(row=0,column=3)
         tb.Button(frm, text="Train", bootstyle="warning", command=self._train_risk).grid(row=0,column=4,padx=5)
-        tb.Button(frm, text="Flag At-Risk", bootstyle="danger", command=self._flag_risk).grid(row=0,column=5,padx=5)
+        tb.Button(frm, text="Cancel", bootstyle="secondary", command=self._cancel_training).grid(row=0,column=5,padx=5)
+        tb.Button(frm, text="Flag At-Risk", bootstyle="danger", command=self._flag_risk).grid(row=0,column=6,padx=5)
+        self.train_progress = tb.Progressbar(frm, mode="determinate", maximum=100, length=160)
+        self.train_progress.grid(row=0,column=7,padx=5)
 
         self.risk_list = tk.Listbox(tab, height=10)
         self.risk_list.pack(fill=BOTH, expand=1, padx=5, pady=5)
+        self._show_risk_list()
 
     def _build_topics_tab(self):
         tab = tb.Frame(self.nb); self.nb.add(tab, text="Topics")
@@ -255,58 +273,129 @@ class EduSenseApp:
     def _build_reports_tab(self):
         tab = tb.Frame(self.nb); self.nb.add(tab, text="Reports")
         tb.Button(tab, text="Export All CSV", bootstyle="primary", command=self._export_feedback_csv).pack(pady=10)
-        tb.Button(tab, text="Export All PDFs", bootstyle="secondary", command=self._export_all_pdfs).pack()
+        tb.Button(tab, text="Export All PDFs (zip)", bootstyle="secondary", command=self._export_all_pdfs).pack()
+        tb.Button(tab, text="Cancel Export", bootstyle="secondary-outline", command=self._cancel_export).pack(pady=5)
+        self.export_progress = tb.Progressbar(tab, mode="determinate", maximum=100, length=300)
+        self.export_progress.pack(pady=5)
 
     def _build_settings_tab(self):
         tab = tb.Frame(self.nb); self.nb.add(tab, text="Settings")
         tb.Label(tab, text="Data File: " + DATA_FILE, bootstyle="info").pack(anchor=W, padx=5, pady=5)
         tb.Label(tab, text="Feedback Store: " + FEEDBACK_STORE, bootstyle="info").pack(anchor=W, padx=5)
-        tb.Label(tab, text="Risk Model: " + RISK_MODEL_FILE, bootstyle="info").pack(anchor=W, padx=5)
+        tb.Label(tab, text="Model Registry: " + REGISTRY_DIR, bootstyle="info").pack(anchor=W, padx=5)
 
     # Logic & Callbacks
     def _refresh_table(self):
-        self.tree.delete(*self.tree.get_children())
-        for _, r in self.filtered.iterrows():
-            self.tree.insert(
-                "", END,
-                values=(r['Name'], r['Math'], r['Science'], r['English'], r['Attendance'], r.get('Remarks', ""))
-            )
+        rows = self.filtered if 'Remarks' in self.filtered.columns else self.filtered.assign(Remarks="")
+        self.table.set_frame(rows)
         self.update_status(f"{len(self.filtered)} records displayed.")
 
+    def _build_search_index(self):
+        ids = self.df['StudentID'] if 'StudentID' in self.df.columns else [""] * len(self.df)
+        self.search_index = SearchIndex.from_pairs(self.df.index, self.df['Name'], ids)
+
+    def _debounce(self, action):
+        """Runs action once input has been idle for SEARCH_DEBOUNCE_MS."""
+        pending = self._debounced.pop(action.__name__, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self._debounced[action.__name__] = self.root.after(SEARCH_DEBOUNCE_MS, action)
+
     def _apply_filter(self):
-        q = self.search_var.get().lower()
-        self.filtered = self.df[self.df['Name'].str.lower().str.contains(q)] if q else self.df.copy()
+        self._debounced.pop('_apply_filter', None)
+        keys = self.search_index.search(self.search_var.get())
+        self.filtered = self.df if keys is None else self.df.loc[keys]
         self._refresh_table()
 
+    def _suggest_names(self):
+        self._debounced.pop('_suggest_names', None)
+        keys = self.search_index.search(self.sel_fb.get(), limit=NAME_SUGGESTIONS)
+        self.sel_fb['values'] = list(self.df['Name'][:NAME_SUGGESTIONS] if keys is None else self.df.loc[keys, 'Name'])
+
+    def _selected_rows(self):
+        """Roster rows for the name picked in the feedback tab."""
+        return self.df[self.df['Name'] == self.sel_fb.get()]
+
     def _show_feedback(self):
         name = self.sel_fb.get()
-        ai = nlp_feedback(self.df[self.df['Name'] == name].iloc[0])['feedback']
-        man = manual_feedback.get(name, "")
+        rows = self._selected_rows()
+        ai = nlp_feedback(rows.iloc[0])['feedback']
+        man = self.feedback.get(student_keys(rows).iloc[0])
         self.fb_text.delete(1.0, END)
         self.fb_text.insert(END, f"AI: {ai}\nManual: {man}")
         self.update_status(f"Showing feedback for {name}")
 
     def _gen_ai_fb(self):
-        if not self.ai_gen:
+        if self.fb_job and not self.fb_job.finished():
+            self.update_status("AI feedback is already being generated.")
+            return
+        if self.ai_loader.ready() and not self.ai_loader.get():
             messagebox.showwarning("AI Unavailable", "Model not loaded.")
             return
-        name = self.sel_fb.get()
-        row = self.df[self.df['Name'] == name].iloc[0]
-        prompt = f"Student: {name}\nMath:{row['Math']},Sci:{row['Science']},Eng:{row['English']}\nConstructive feedback."
-        self.progress.start()
-        out = self.ai_gen(prompt, max_length=80)[0]['generated_text']
-        self.progress.stop()
-        manual_feedback[name] = out
-        with open(FEEDBACK_STORE, "wb") as f:
-            pickle.dump(manual_feedback, f)
-        self._show_feedback()
+        target = self.fb_target.get()
+        if target == "All":
+            rows = self.df
+        elif target == "At-Risk":
+            rows = self.df[self.df['AtRisk'] == True] if 'AtRisk' in self.df.columns else self.df.iloc[0:0]
+        else:
+            rows = self._selected_rows()
+        if rows.empty:
+            messagebox.showinfo("AI Feedback", f"No students to generate feedback for ({target}).")
+            return
+        prompts = {
+            key: f"Student: {name}\nMath:{m},Sci:{s},Eng:{e}\nConstructive feedback."
+            for key, name, m, s, e in zip(student_keys(rows), rows['Name'], rows['Math'], rows['Science'], rows['English'])
+        }
+        # Generation runs on the job queue's worker thread; results are picked up by _poll_ai_fb
+        self.fb_job = self.fb_jobs.submit(target, prompts)
+        self.progress['value'] = 0
+        self.update_status(f"Generating AI feedback for {len(prompts)} student(s)...")
+        self.root.after(200, self._poll_ai_fb)
+
+    def _poll_ai_fb(self):
+        job = self.fb_job
+        # Read the state before draining: a finished job has already queued all of its results
+        finished = job.finished()
+        results = job.drain()
+        if results:
+            self.feedback.set_many(results, source="ai")
+            if not set(student_keys(self._selected_rows())).isdisjoint(dict(results)):
+                self._show_feedback()
+        self.progress['value'] = job.progress() * 100
+        eta = job.eta()
+        self.fb_eta.config(text=f"{job.completed}/{job.total}" + (f"  ETA {eta:.0f}s" if eta is not None else ""))
+        if not finished:
+            self.root.after(200, self._poll_ai_fb)
+        elif job.state == "failed":
+            messagebox.showwarning("AI Feedback", f"Generation failed: {job.error}")
+            self.update_status(f"AI feedback stopped after {job.completed}/{job.total}; use Resume to retry.")
+        elif job.state == "cancelled":
+            self.update_status(f"AI feedback cancelled after {job.completed}/{job.total}; use Resume to continue.")
+        else:
+            self.update_status(f"AI feedback generated for {job.total} student(s).")
+
+    def _cancel_ai_fb(self):
+        if self.fb_job and not self.fb_job.finished():
+            self.fb_job.cancel()
+            self.update_status("Cancelling AI feedback after the current batch...")
+
+    def _resume_ai_fb(self):
+        job = self.fb_job
+        if not job or not job.finished() or not job.pending:
+            self.update_status("Nothing to resume.")
+            return
+        self.fb_jobs.resume(job)
+        self.update_status(f"Resuming AI feedback: {len(job.pending)} student(s) left.")
+        self.root.after(200, self._poll_ai_fb)
 
     def _save_manual_fb(self):
         name = self.sel_fb.get()
+        rows = self._selected_rows()
+        if rows.empty:
+            messagebox.showwarning("Feedback", f"No student named {name}.")
+            return
         txt = self.fb_text.get(1.0, END).strip()
-        manual_feedback[name] = txt
-        with open(FEEDBACK_STORE, "wb") as f:
-            pickle.dump(manual_feedback, f)
+        self.feedback.set(student_keys(rows).iloc[0], txt)
         self.update_status(f"Manual feedback for {name} saved.")
 
     def _export_feedback_csv(self):
@@ -314,7 +403,7 @@ class EduSenseApp:
         if not path:
             return
         df2 = self.df.copy()
-        df2['Feedback'] = df2['Name'].apply(lambda n: manual_feedback.get(n, ""))
+        df2['Feedback'] = student_keys(df2).map(self.feedback.all()).fillna("")
         save_csv(df2, path)
         self.update_status(f"Feedback CSV saved to {path}")
 
@@ -322,43 +411,151 @@ class EduSenseApp:
         path = filedialog.asksaveasfilename(defaultextension=".pdf")
         if not path:
             return
-        fb = {n: manual_feedback.get(n, "") for n in self.df['Name']}
+        stored = self.feedback.all()
+        fb = {n: stored.get(k, "") for k, n in zip(student_keys(self.df), self.df['Name'])}
         save_pdf(fb, path)
         self.update_status(f"Feedback PDF saved to {path}")
 
     def _export_all_pdfs(self):
-        folder = filedialog.askdirectory()
-        if not folder:
+        if self.export_job and not self.export_job.done():
+            self.update_status("An export is already running.")
             return
-        for n in self.df['Name']:
-            save_pdf({n: manual_feedback.get(n, "")}, os.path.join(folder, f"{n}.pdf"))
-        self.update_status("All PDFs exported.")
+        path = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=[("Zip archive", "*.zip")])
+        if not path:
+            return
+        # One PDF per student, rendered across a process pool and streamed into a single zip
+        stored = self.feedback.all()
+        self.export_job = ReportExportJob([(n, stored.get(k, "")) for k, n in zip(student_keys(self.df), self.df['Name'])], path)
+        self.export_progress['value'] = 0
+        self.update_status(f"Exporting {self.export_job.total} PDFs...")
+        self.root.after(200, self._poll_export)
+
+    def _poll_export(self):
+        job = self.export_job
+        self.export_progress['value'] = job.progress() * 100
+        if not job.done():
+            self.update_status(f"Exporting PDFs: {job.completed}/{job.total}")
+            self.root.after(200, self._poll_export)
+        elif job.error:
+            messagebox.showerror("Export failed", str(job.error))
+            self.update_status("PDF export failed.")
+        elif job.cancelled():
+            self.update_status("PDF export cancelled.")
+        else:
+            self.update_status(f"All PDFs exported to {job.path}")
+
+    def _cancel_export(self):
+        if self.export_job and not self.export_job.done():
+            self.export_job.cancel()
+            self.update_status("Cancelling PDF export...")
 
     def _train_risk(self):
-        self.risk_clf = train_risk_model(self.df, self.thresh_avg.get(), self.thresh_att.get())
-        self.update_status("Risk model trained.")
+        if self.train_job and not self.train_job.done():
+            self.update_status("Training already in progress.")
+            return
+        # Trains in a background process; the current model keeps serving until the new one is swapped in
+        self.train_job = RiskTrainingJob(self.df, self.thresh_avg.get(), self.thresh_att.get(), live_model=self.risk_model)
+        self.train_progress['value'] = 0
+        self.update_status("Training risk model...")
+        self.root.after(200, self._poll_training)
+
+    def _poll_training(self):
+        job = self.train_job
+        self.train_progress['value'] = job.progress() * 100
+        if not job.done():
+            self.root.after(200, self._poll_training)
+        elif job.cancelled():
+            self.update_status("Risk model training cancelled.")
+        elif job.future.exception():
+            messagebox.showerror("Training failed", str(job.future.exception()))
+            self.update_status("Risk model training failed.")
+        else:
+            self.update_status("Risk model trained.")
+
+    def _cancel_training(self):
+        if self.train_job and not self.train_job.done():
+            self.train_job.cancel()
+            self.update_status("Cancelling training...")
 
     def _flag_risk(self):
-        if not self.risk_clf:
+        clf = self.risk_model.get()
+        if not clf:
             messagebox.showwarning("No Model", "Train model first.")
             return
+        scores = predict_risk_batch(self.df, clf)
+        self.df['RiskProb'] = scores['RiskProb']
+        self.df['AtRisk'] = scores['AtRisk']
+        if 'StudentID' in scores.columns:
+            get_store().save_risk(scores)
+        self._show_risk_list()
+        # Alerts go through the persistent outbox; the dispatcher thread sends them in batches
+        queued = notify_at_risk(self.df)
+        self.update_status(f"At-risk students flagged. {queued} alert(s) queued.")
+
+    def _show_risk_list(self):
         self.risk_list.delete(0, END)
-        for _, r in self.df.iterrows():
-            if predict_risk(r, self.risk_clf):
-                self.risk_list.insert(END, r['Name'])
-        self.update_status("At-risk students flagged.")
+        if 'AtRisk' not in self.df.columns:
+            return
+        flagged = self.df[self.df['AtRisk'] == True]
+        if flagged.empty:
+            return
+        recs = self._recommendations()
+        for key, name in zip(student_keys(flagged), flagged['Name']):
+            rec = recs.get(key, {})
+            line = f"{name}  |  focus: {', '.join(rec.get('subjects', [])) or '-'}"
+            if rec.get('websites'):
+                line += f"  |  try {rec['websites'][0]['name']}"
+            self.risk_list.insert(END, line)
+
+    def _recommendations(self):
+        """Resources for every loaded student from one recommend_batch pass, kept until another roster is loaded."""
+        if self.recommendations is None:
+            # Subjects the roster has no column for never count as weak
+            scores = self.df.reindex(columns=SUBJECTS, fill_value=100.0).assign(Key=student_keys(self.df))
+            self.recommendations = recommend_batch(scores, key='Key')
+        return self.recommendations
 
     def _gen_topics(self):
         docs = self.df['Remarks'].fillna("").tolist()
         topics = get_topics(docs, self.topic_n.get())
         self.topics_box.delete(1.0, END)
-        for i, t in enumerate(topics, 1):
-            self.topics_box.insert(END, f"Topic {i}: {t}\n")
-        self.update_status(f"{len(topics)} topics generated.")
+        for t in topics:
+            self.topics_box.insert(END, f"{t}\n")
+        self.update_status(f"{len(topics)} topics generated." if topics[0].startswith("Topic") else topics[0])
 
     def run(self):
         self.root.mainloop()
 
+    def profile_startup(self):
+        """
+        Startup measurement mode: reports time-to-first-window and per-module
+        import cost, waits for the background warm-ups, then closes the app.
+        """
+        self.root.update()
+        first_window = time.perf_counter() - _STARTUP_T0
+        print(f"Time to first window: {first_window:.2f}s (eager imports {_EAGER_IMPORTS_SECONDS:.2f}s)")
+
+        def report():
+            if not (self.ai_loader.ready() and self.risk_loader.ready()):
+                self.root.after(100, report)
+                return
+            for loader in (self.ai_loader, self.risk_loader):
+                status = f"failed: {loader.error}" if loader.error else "ok"
+                print(f"Warm-up {loader.name}: {loader.duration:.2f}s ({status})")
+            used = {name for name, module in lazy_modules().items() if module.loaded()}
+            for module in lazy_modules().values():
+                module.load()
+            for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1]):
+                note = "" if name in used else " (deferred until first use)"
+                print(f"Import {name}: {seconds:.2f}s{note}")
+            self.root.destroy()
+
+        self.root.after(0, report)
+        self.root.mainloop()
+
 if __name__ == "__main__":
     app = EduSenseApp()
-    app.run()
+    if "--profile-startup" in sys.argv:
+        app.profile_startup()
+    else:
+        app.run()
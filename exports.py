@@ -0,0 +1,119 @@
+# exports.py
+
+import io
+import time
+import pandas as pd
+from flask import Blueprint, Response, abort, request, stream_with_context
+from models.feedback_store import get_feedback_store
+from models.student_store import COLUMNS, get_store
+
+EXPORT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+EXPORT_COLUMNS = COLUMNS + ['RiskProb', 'AtRisk', 'Feedback']
+MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+exports = Blueprint('exports', __name__, url_prefix='/export')
+
+# --- Chunk source ---
+def export_chunks(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields roster chunks joined with the cached risk scores and the stored
+    feedback. Only one chunk (plus the small risk table) is in memory at a time.
+    """
+    store = get_store()
+    feedback = get_feedback_store()
+    risk = store.load_risk().set_index('StudentID')
+    for chunk in store.iter_chunks(chunk_size):
+        chunk['RiskProb'] = chunk['StudentID'].map(risk['RiskProb']).astype(float)
+        chunk['AtRisk'] = chunk['StudentID'].map(risk['AtRisk']).astype('boolean')
+        chunk['Feedback'] = chunk['StudentID'].map(feedback.get_many(chunk['StudentID'].unique())).fillna('')
+        yield chunk[EXPORT_COLUMNS]
+
+# --- Encoders ---
+def stream_csv(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+    if header:
+        yield pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(index=False)
+
+def stream_jsonl(chunks):
+    for chunk in chunks:
+        if len(chunk):
+            yield chunk.to_json(orient='records', lines=True, force_ascii=False).rstrip('\n') + '\n'
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands bytes back between row groups, keeping the offset for tell()."""
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def take(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+def stream_parquet(chunks):
+    # pyarrow is optional; without it the route answers 501 before streaming starts
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    for chunk in chunks:
+        if writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(sink, table.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        yield sink.take()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, pa.Table.from_pandas(pd.DataFrame(columns=EXPORT_COLUMNS)).schema)
+    writer.close()
+    yield sink.take()
+
+ENCODERS = {'csv': stream_csv, 'jsonl': stream_jsonl, 'parquet': stream_parquet}
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+# --- Routes ---
+@exports.route('/students.<fmt>')
+def export_students(fmt):
+    """Roster + risk + feedback as CSV, JSON Lines or Parquet, streamed chunk by chunk."""
+    if fmt not in ENCODERS:
+        abort(404)
+    if fmt == 'parquet' and not parquet_available():
+        abort(501, description="Parquet export needs pyarrow installed on the server.")
+    chunk_size = min(max(request.args.get('chunk_size', EXPORT_CHUNK_SIZE, type=int), 1), MAX_CHUNK_SIZE)
+    filename = f"students-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    body = ENCODERS[fmt](export_chunks(chunk_size))
+    return Response(
+        stream_with_context(body),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+def register_exports(server):
+    server.register_blueprint(exports)
+    return server
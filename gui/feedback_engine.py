@@ -1,24 +1,90 @@
 #feedback_engine.py
 
-from transformers import pipeline
-import pyttsx3
+import time
+from gui.lazy import lazy_import, BackgroundLoader
+
+transformers = lazy_import("transformers")
+pyttsx3 = lazy_import("pyttsx3")
+
+FALLBACK_FEEDBACK = "Needs more study in weak subjects."
+
+def generate_batch(generator, prompts, batch_size=8, max_new_tokens=40, progress=None):
+    """
+    Runs prompts through a text-generation pipeline in padded batches.
+    Prompts are sorted by token length so each batch pads as little as possible;
+    results come back in the original order. progress(done, total) is called
+    after each batch. Returns (texts, stats) where stats includes students_per_second.
+    """
+    start = time.perf_counter()
+    tokenizer = generator.tokenizer
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token_id = generator.model.config.eos_token_id
+    # GPT-style models continue from the right, so pad on the left
+    tokenizer.padding_side = "left"
+
+    lengths = [len(ids) for ids in tokenizer(prompts)["input_ids"]]
+    order = sorted(range(len(prompts)), key=lengths.__getitem__)
+    texts = [None] * len(prompts)
+    for i in range(0, len(order), batch_size):
+        chunk = order[i:i + batch_size]
+        outputs = generator(
+            [prompts[j] for j in chunk],
+            batch_size=batch_size,
+            max_new_tokens=max_new_tokens,
+            pad_token_id=tokenizer.pad_token_id,
+        )
+        for j, out in zip(chunk, outputs):
+            texts[j] = (out[0] if isinstance(out, list) else out)["generated_text"]
+        if progress:
+            progress(min(i + batch_size, len(order)), len(order))
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "students": len(prompts),
+        "seconds": seconds,
+        "students_per_second": len(prompts) / seconds if seconds else 0.0,
+        "batch_size": batch_size,
+    }
+    return texts, stats
 
 class FeedbackEngine:
     def __init__(self):
-        try:
-            self.feedback_gen = pipeline("text-generation", model="distilgpt2")
-        except:
-            self.feedback_gen = None
-        self.tts_engine = pyttsx3.init()
-    
-    def generate_feedback(self, student_data):
+        # The pipeline warms up in the background; the text-to-speech engine starts on first use
+        self._gen_loader = BackgroundLoader("feedback-gen", lambda: transformers.pipeline("text-generation", model="distilgpt2"))
+        self._tts_engine = None
+        self.last_batch_stats = None
+
+    @property
+    def feedback_gen(self):
+        """The generation pipeline, waiting for warm-up if needed (None if it failed to load)."""
+        return self._gen_loader.get()
+
+    @property
+    def tts_engine(self):
+        if self._tts_engine is None:
+            self._tts_engine = pyttsx3.init()
+        return self._tts_engine
+
+    def ready(self):
+        return self._gen_loader.ready()
+
+    def build_prompt(self, student_data):
         # Use ML, sentiment analysis, topic modeling, etc.
-        prompt = f"Student {student_data['name']}, scores: {student_data['marks']}, remarks: {student_data['remarks']}"
-        if self.feedback_gen:
-            result = self.feedback_gen(prompt, max_length=40)[0]["generated_text"]
-        else:
-            result = "Needs more study in weak subjects."
-        return result
+        return f"Student {student_data['name']}, scores: {student_data['marks']}, remarks: {student_data['remarks']}"
+
+    def generate_feedback(self, student_data):
+        return self.generate_feedback_batch([student_data], batch_size=1)[0]
+
+    def generate_feedback_batch(self, students, batch_size=8, max_new_tokens=40, progress=None):
+        """
+        Generates feedback for many students with batched forward passes.
+        Throughput is kept in self.last_batch_stats (see generate_batch).
+        """
+        if not self.feedback_gen:
+            return [FALLBACK_FEEDBACK for _ in students]
+        prompts = [self.build_prompt(s) for s in students]
+        texts, self.last_batch_stats = generate_batch(self.feedback_gen, prompts, batch_size, max_new_tokens, progress)
+        return texts
 
     def speak_feedback(self, feedback_text):
         self.tts_engine.say(feedback_text)
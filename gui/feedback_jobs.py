@@ -0,0 +1,119 @@
+#feedback_jobs.py
+
+import itertools
+import queue
+import threading
+import time
+from gui.feedback_engine import generate_batch
+
+class FeedbackJob:
+    """
+    One "generate feedback for these students" request.
+    Finished items are handed back through drain() as they complete; after
+    cancel() the unfinished students stay in `pending` so the job can resume.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, label, prompts):
+        # prompts: {student id: prompt}; shortest first so batches pad little
+        self.id = next(self._ids)
+        self.label = label
+        self.prompts = prompts
+        self.pending = sorted(prompts, key=lambda key: len(prompts[key]))
+        self.total = len(prompts)
+        self.completed = 0
+        self.error = None
+        self.state = "queued"   # queued, running, cancelled, failed, done
+        self.elapsed = 0.0
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+
+    def progress(self):
+        return self.completed / self.total if self.total else 1.0
+
+    def eta(self):
+        """Seconds left at the rate seen so far, or None before the first batch."""
+        if not self.completed or not self.elapsed:
+            return None
+        return self.elapsed / self.completed * (self.total - self.completed)
+
+    def finished(self):
+        return self.state in ("cancelled", "failed", "done")
+
+    def cancel(self):
+        """Stops the job after the batch in flight."""
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def drain(self):
+        """Returns the (student id, text) pairs finished since the last call."""
+        items = []
+        try:
+            while True:
+                items.append(self._results.get_nowait())
+        except queue.Empty:
+            return items
+
+
+class FeedbackJobQueue:
+    """
+    Runs feedback jobs one after another on a single worker thread so the Tk
+    event loop stays free. get_generator() may block until the model is loaded;
+    that wait happens on the worker as well. Poll jobs from root.after.
+    """
+    def __init__(self, get_generator, batch_size=8, max_new_tokens=50):
+        self.get_generator = get_generator
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="feedback-jobs", daemon=True)
+        self._thread.start()
+
+    def submit(self, label, prompts):
+        job = FeedbackJob(label, prompts)
+        self._jobs.put(job)
+        return job
+
+    def resume(self, job):
+        """Re-queues a cancelled or failed job; already finished students are skipped."""
+        if not job.finished() or not job.pending:
+            return job
+        job._cancel.clear()
+        job.error = None
+        job.state = "queued"
+        self._jobs.put(job)
+        return job
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                job.error = e
+                job.state = "failed"
+
+    def _process(self, job):
+        if job.cancelled():
+            job.state = "cancelled"
+            return
+        job.state = "running"
+        generator = self.get_generator()
+        if generator is None:
+            raise RuntimeError("Model not loaded.")
+        while job.pending:
+            if job.cancelled():
+                job.state = "cancelled"
+                return
+            start = time.perf_counter()
+            keys = job.pending[:self.batch_size]
+            texts, _ = generate_batch(generator, [job.prompts[k] for k in keys],
+                                      batch_size=self.batch_size, max_new_tokens=self.max_new_tokens)
+            for key, text in zip(keys, texts):
+                job._results.put((key, text))
+            del job.pending[:len(keys)]
+            job.completed += len(keys)
+            job.elapsed += time.perf_counter() - start
+        job.state = "done"
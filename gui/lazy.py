@@ -0,0 +1,75 @@
+#lazy.py
+
+import importlib
+import threading
+import time
+
+# Seconds spent importing each lazily loaded module, filled in on first use
+IMPORT_TIMES = {}
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORT_TIMES[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+_lazy_modules = {}
+
+def lazy_import(name):
+    """Returns a shared LazyModule proxy for `name`."""
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
+
+def lazy_modules():
+    return dict(_lazy_modules)
+
+
+class BackgroundLoader:
+    """
+    Builds something expensive (e.g. a transformers pipeline) on a daemon thread
+    so the UI can come up first. get() returns the value, or None if loading
+    failed or has not finished within the timeout.
+    """
+    def __init__(self, name, load):
+        self.name = name
+        self.value = None
+        self.error = None
+        self.duration = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(load,), name=f"load-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, load):
+        start = time.perf_counter()
+        try:
+            self.value = load()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.duration = time.perf_counter() - start
+            self._done.set()
+
+    def ready(self):
+        return self._done.is_set()
+
+    def get(self, timeout=None):
+        self._done.wait(timeout)
+        return self.value
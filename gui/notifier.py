@@ -1,9 +1,303 @@
 #notifier.py
 
-def send_email(recipient, subject, message):
-    # (SMTP config required)
-    pass
+import hashlib
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from email.message import EmailMessage
 
-def send_sms(number, message):
-    # (Twilio or other SMS API integration)
-    pass
+OUTBOX_DB = "data/outbox.db"
+SMTP_HOST = os.environ.get("EDUSENSE_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.environ.get("EDUSENSE_SMTP_PORT", 25))
+SMTP_USER = os.environ.get("EDUSENSE_SMTP_USER")
+SMTP_PASSWORD = os.environ.get("EDUSENSE_SMTP_PASSWORD")
+SMTP_STARTTLS = os.environ.get("EDUSENSE_SMTP_STARTTLS") == "1"
+MAIL_FROM = os.environ.get("EDUSENSE_MAIL_FROM", "edusense@localhost")
+# Where at-risk alerts go when the roster has no guardian email column
+ALERT_TO = os.environ.get("EDUSENSE_ALERT_TO")
+
+BATCH_SIZE = 200
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30        # seconds; doubles with every failed attempt
+BACKOFF_MAX = 3600
+POLL_INTERVAL = 5
+# A batch claimed this long ago by a process that never finished it is sent again
+STALE_CLAIM = 600
+
+def _now():
+    return time.time()
+
+def idempotency_key(channel, recipient, subject, body):
+    return hashlib.sha1("\x00".join([channel, recipient, subject or "", body]).encode()).hexdigest()
+
+
+class Outbox:
+    """
+    Persistent queue of outgoing messages in SQLite (WAL mode).
+    Each message has an idempotency key, so enqueueing the same alert twice,
+    or again after a restart, stores it once. Rows move pending -> sending -> sent,
+    or back to pending with a later next_attempt_at after a failure, and to
+    failed once MAX_ATTEMPTS is reached.
+    """
+    def __init__(self, path=OUTBOX_DB):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, idem_key TEXT NOT NULL UNIQUE, channel TEXT NOT NULL, "
+                "recipient TEXT NOT NULL, subject TEXT NOT NULL DEFAULT '', body TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, claimed_at REAL, last_error TEXT, "
+                "created_at REAL NOT NULL, sent_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, channel, next_attempt_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = _Tx(conn)
+        return self._local.conn
+
+    def enqueue_many(self, messages):
+        """messages: iterable of (channel, recipient, subject, body, key or None). Returns how many were new."""
+        now = _now()
+        rows = [(key or idempotency_key(ch, rcpt, subj, body), ch, rcpt, subj or "", body, now, now)
+                for ch, rcpt, subj, body, key in messages]
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO outbox (idem_key, channel, recipient, subject, body, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            return conn.total_changes - before
+
+    def claim(self, channel, limit=BATCH_SIZE):
+        """Marks up to `limit` due messages as sending and returns them as (id, key, recipient, subject, body)."""
+        now = _now()
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?", (now - STALE_CLAIM,)
+            )
+            rows = conn.execute(
+                "SELECT id, idem_key, recipient, subject, body FROM outbox "
+                "WHERE status = 'pending' AND channel = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (channel, now, limit),
+            ).fetchall()
+            conn.executemany("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                             [(now, r[0]) for r in rows])
+        return rows
+
+    def mark_sent(self, ids):
+        now = _now()
+        with self._conn() as conn:
+            conn.executemany("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                             [(now, i) for i in ids])
+
+    def mark_failed(self, failures):
+        """failures: [(id, error)]. Schedules a retry with exponential backoff, or gives up after MAX_ATTEMPTS."""
+        now = _now()
+        with self._conn() as conn:
+            for msg_id, error in failures:
+                attempts = conn.execute("SELECT attempts FROM outbox WHERE id = ?", (msg_id,)).fetchone()[0] + 1
+                delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    ('failed' if attempts >= MAX_ATTEMPTS else 'pending', attempts, now + delay, str(error), msg_id),
+                )
+
+    def release(self, ids):
+        """Puts claimed messages back without counting an attempt (e.g. on shutdown)."""
+        with self._conn() as conn:
+            conn.executemany("UPDATE outbox SET status = 'pending' WHERE id = ? AND status = 'sending'",
+                             [(i,) for i in ids])
+
+    def counts(self):
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
+class _Tx:
+    """Autocommit connection whose with-block is one BEGIN IMMEDIATE ... COMMIT transaction."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class SMTPSender:
+    """Sends a batch over a single SMTP connection. Returns (sent ids, [(id, error)])."""
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD,
+                 starttls=SMTP_STARTTLS, sender=MAIL_FROM, timeout=30):
+        self.host, self.port, self.user, self.password = host, port, user, password
+        self.starttls, self.sender, self.timeout = starttls, sender, timeout
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def send_batch(self, batch):
+        sent, failed = [], []
+        try:
+            smtp = self._connect()
+        except (OSError, smtplib.SMTPException) as e:
+            return sent, [(row[0], e) for row in batch]
+        try:
+            for i, (msg_id, key, recipient, subject, body) in enumerate(batch):
+                msg = EmailMessage()
+                msg["From"] = self.sender
+                msg["To"] = recipient
+                msg["Subject"] = subject
+                # Stable Message-ID so a resend after a crash can be recognised as a duplicate downstream
+                msg["Message-ID"] = f"<{key}@edusense>"
+                msg.set_content(body)
+                try:
+                    smtp.send_message(msg)
+                    sent.append(msg_id)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    failed.append((msg_id, e))
+                except (OSError, smtplib.SMTPException) as e:
+                    # The connection is gone: this and the rest of the batch retry later
+                    failed.extend((row[0], e) for row in batch[i:])
+                    break
+        finally:
+            try:
+                smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+        return sent, failed
+
+
+class Dispatcher:
+    """
+    Background thread that drains the outbox in batches, one sender call per
+    batch. notify() wakes it; otherwise it polls every POLL_INTERVAL seconds so
+    retries become due on their own. Channels without a sender (e.g. 'sms' until
+    a provider is configured) stay queued.
+    """
+    def __init__(self, outbox=None, senders=None, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL):
+        self.outbox = outbox or Outbox()
+        self.senders = senders if senders is not None else {'email': SMTPSender()}
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self):
+        self._wake.set()
+
+    def drain(self):
+        """Sends everything that is due now; returns the number of messages sent."""
+        total = 0
+        for channel, sender in self.senders.items():
+            while not self._stop.is_set():
+                batch = self.outbox.claim(channel, self.batch_size)
+                if not batch:
+                    break
+                sent, failed = sender.send_batch(batch)
+                self.outbox.mark_sent(sent)
+                self.outbox.mark_failed(failed)
+                total += len(sent)
+                if failed and not sent:
+                    # Nothing got through; leave the rest for the backoff
+                    break
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logging.exception("Notifier error")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """Returns the process-wide dispatcher, starting its thread on first use."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = Dispatcher().start()
+    return _dispatcher
+
+def send_email(recipient, subject, message, key=None):
+    """Queues an email; the dispatcher sends it in the background. Returns True if it was new."""
+    dispatcher = get_dispatcher()
+    added = dispatcher.outbox.enqueue_many([("email", recipient, subject, message, key)])
+    dispatcher.notify()
+    return bool(added)
+
+def send_sms(number, message, key=None):
+    # Queued until an SMS sender (Twilio or other SMS API) is registered with the dispatcher
+    dispatcher = get_dispatcher()
+    added = dispatcher.outbox.enqueue_many([("sms", number, "", message, key)])
+    dispatcher.notify()
+    return bool(added)
+
+def notify_at_risk(df, email_column="GuardianEmail"):
+    """
+    Queues alerts for the rows of df flagged AtRisk: one email per student when
+    the roster has an email_column, otherwise a single summary to EDUSENSE_ALERT_TO.
+    Keys include the date, so flagging again on the same day sends nothing new.
+    Returns the number of messages queued.
+    """
+    flagged = df[df['AtRisk'] == True]
+    if flagged.empty:
+        return 0
+    day = time.strftime("%Y-%m-%d")
+    messages = []
+    if email_column in flagged.columns:
+        for name, sid, prob, email in zip(flagged['Name'], flagged.get('StudentID', flagged['Name']),
+                                          flagged['RiskProb'], flagged[email_column]):
+            if isinstance(email, str) and email.strip():
+                body = (f"{name} has been flagged as at risk (estimated risk {prob:.0%}).\n"
+                        "Please get in touch with the class teacher.")
+                messages.append(("email", email.strip(), f"EduSense alert: {name}", body, f"risk:{sid}:{day}"))
+    elif ALERT_TO:
+        lines = [f"- {n} ({p:.0%})" for n, p in zip(flagged['Name'], flagged['RiskProb'])]
+        body = f"{len(lines)} student(s) flagged as at risk:\n" + "\n".join(lines)
+        key = f"risk-summary:{day}:{hashlib.sha1(body.encode()).hexdigest()}"
+        messages.append(("email", ALERT_TO, "EduSense: at-risk students", body, key))
+    if not messages:
+        return 0
+    dispatcher = get_dispatcher()
+    added = dispatcher.outbox.enqueue_many(messages)
+    dispatcher.notify()
+    return added
@@ -0,0 +1,124 @@
+#virtual_tree.py
+
+class VirtualTree:
+    """
+    Virtual table mode for a ttk Treeview: only the rows around the viewport
+    (visible rows plus `buffer` above and below) exist as Tk items.
+
+    Rows come from a DataFrame; its index labels are used as item ids, so a
+    filtered subset of the same frame keeps its ids. set_frame() then works as a
+    diff: rows that stay in the window are left alone, only the rest are deleted
+    or inserted. The scrollbar reflects the position in the whole frame; when
+    the tree scrolls near the edge of the window, the window slides along.
+    """
+    def __init__(self, tree, scrollbar, columns, buffer=50):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.columns = list(columns)
+        self.buffer = buffer
+        self.frame = None
+        self.lo = 0
+        self.hi = 0
+        self.top = 0
+        self._shown = {}
+        self._pending = None
+        tree.configure(yscrollcommand=self._on_tree_scroll)
+        scrollbar.configure(command=self._on_scrollbar)
+
+    def __len__(self):
+        return 0 if self.frame is None else len(self.frame)
+
+    def visible_rows(self):
+        """Rows that fit in the widget, from the rendered row height when available."""
+        rows = int(self.tree.cget("height"))
+        children = self.tree.get_children()
+        if children:
+            box = self.tree.bbox(children[0])
+            if box and box[3]:
+                rows = max(rows, self.tree.winfo_height() // box[3])
+        return rows
+
+    # --- Data ---
+    def set_frame(self, frame, keep_position=False):
+        """Shows `frame` (which must have self.columns); replaces only rows that change."""
+        self.frame = frame
+        self._show(self.top if keep_position else 0)
+
+    def _row_values(self, lo, hi):
+        part = self.frame.iloc[lo:hi]
+        keys = [str(k) for k in part.index]
+        return keys, list(part[self.columns].itertuples(index=False, name=None))
+
+    # --- Windowing ---
+    def _show(self, top):
+        total = len(self)
+        visible = self.visible_rows()
+        top = max(0, min(top, max(total - visible, 0)))
+        lo = max(0, top - self.buffer)
+        hi = min(total, top + visible + self.buffer)
+        keys, values = self._row_values(lo, hi) if total else ([], [])
+
+        wanted = dict(zip(keys, values))
+        stale = [k for k in self._shown if k not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+        # Rows kept from the last frame, in their current tree order; a re-sort or a
+        # ranked search can hand back the same keys in a different order
+        kept = [k for k in self._shown if k in wanted]
+        moved = set()
+        j = 0
+        for i, (key, vals) in enumerate(zip(keys, values)):
+            while j < len(kept) and kept[j] in moved:
+                j += 1
+            shown = self._shown.get(key)
+            if shown is None:
+                self.tree.insert("", i, iid=key, values=vals)
+                continue
+            if j < len(kept) and kept[j] == key:
+                j += 1
+            else:
+                self.tree.move(key, "", i)
+                moved.add(key)
+            if shown != vals:
+                self.tree.item(key, values=vals)
+        self._shown = wanted
+        self.lo, self.hi, self.top = lo, hi, top
+        if hi > lo:
+            self.tree.yview_moveto((top - lo) / (hi - lo))
+        self._update_scrollbar(top, min(top + visible, total))
+
+    def _update_scrollbar(self, first, last):
+        total = len(self)
+        if total:
+            self.scrollbar.set(first / total, last / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_tree_scroll(self, first, last):
+        # Called by the Treeview whenever its own view moves (wheel, keys, see())
+        n = self.hi - self.lo
+        if not n:
+            self._update_scrollbar(0, 0)
+            return
+        top = self.lo + round(float(first) * n)
+        bottom = self.lo + round(float(last) * n)
+        self.top = top
+        self._update_scrollbar(top, bottom)
+        margin = self.buffer // 2
+        near_start = self.lo > 0 and top - self.lo < margin
+        near_end = self.hi < len(self) and self.hi - bottom < margin
+        if (near_start or near_end) and self._pending is None:
+            # Slide the window after Tk has finished the current scroll
+            self._pending = self.tree.after_idle(self._reposition)
+
+    def _reposition(self):
+        self._pending = None
+        self._show(self.top)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            top = int(float(amount) * len(self))
+        else:
+            step = self.visible_rows() if unit == "pages" else 1
+            top = self.top + int(amount) * step
+        self._show(top)
@@ -0,0 +1,179 @@
+import threading
+
+from models.student_store import get_store, normalize_record
+from models.cohort_stats import CohortAggregates
+from models.search_index import SearchIndex
+
+class CohortCache:
+    """
+    Server-side copy of the roster, keyed by the store's data version.
+    Dash callbacks pass only the version token around and read the frame
+    from here, so payload size no longer grows with the cohort.
+    A hash index on StudentID gives O(1) single-student lookups, and the
+    dashboard aggregates are updated per write instead of recomputed.
+    The name/ID search index is built on first use, outside the lock, and
+    patched on every change after that: edits through upsert() add the one
+    student, and a reload after another process wrote applies the
+    difference between the old and new roster.
+    The cached frame is shared and upsert() patches it in place, one row per
+    edit: callers must copy before mutating it, and copy the rows they keep
+    if they need them to stay as they were.
+    """
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self._lock = threading.Lock()
+        self._version = None
+        self._df = None
+        self._index = {}
+        self._stats = CohortAggregates()
+        self._derived = {}
+        self._search = None
+        self._search_build = threading.Lock()
+        self._search_edits = None
+
+    def snapshot(self):
+        """Returns (version, frame), reloading only when the store has changed."""
+        version = self.store.version()
+        with self._lock:
+            if self._df is None or version != self._version:
+                old = self._df
+                self._df = self.store.load().reset_index(drop=True)
+                self._index = {sid: pos for pos, sid in enumerate(self._df['StudentID'])}
+                self._stats = CohortAggregates(self._df)
+                if self._search is not None:
+                    patch_search(self._search, old, self._df)
+                self._version = version
+            return self._version, self._df
+
+    def frame(self):
+        return self.snapshot()[1]
+
+    def version(self):
+        return self.snapshot()[0]
+
+    def get(self, student_id):
+        """Returns (version, row) for one student, or (version, None) if unknown."""
+        self.snapshot()
+        with self._lock:
+            pos = self._index.get(str(student_id))
+            # A row of the mixed-type frame is a copy, so later edits don't show through
+            return self._version, (self._df.iloc[pos] if pos is not None else None)
+
+    def aggregates(self):
+        """Returns (version, CohortAggregates) as a private copy for the caller."""
+        self.snapshot()
+        with self._lock:
+            return self._version, self._stats.copy()
+
+    def __contains__(self, student_id):
+        self.snapshot()
+        with self._lock:
+            return str(student_id) in self._index
+
+    def search(self, query, limit=None):
+        """Returns (version, StudentIDs matching query by name or ID); None means no filter."""
+        self.snapshot()
+        with self._lock:
+            version, index = self._version, self._search
+        if index is None:
+            index = self._build_search()
+            with self._lock:
+                version = self._version
+        return version, index.search(query, limit)
+
+    def _build_search(self):
+        # Building takes a while on a large roster, so other callbacks keep using the cache meanwhile
+        with self._search_build:
+            with self._lock:
+                if self._search is not None:
+                    return self._search
+                # upsert() patches the frame in place, so build from a copy and note the edits made meanwhile
+                df = self._df
+                pairs = df[['StudentID', 'Student']].copy()
+                self._search_edits = []
+            index = SearchIndex.from_pairs(pairs['StudentID'], pairs['StudentID'], pairs['Student'])
+            with self._lock:
+                if self._df is not df:
+                    # The roster was reloaded while building; catch up with the difference
+                    patch_search(index, pairs, self._df)
+                else:
+                    for record in self._search_edits:
+                        index.add(record['StudentID'], record['StudentID'], record['Student'])
+                self._search_edits = None
+                self._search = index
+            return index
+
+    def derived(self, name, build, update=None):
+        """
+        Memoizes build(frame) for the current data version, e.g. sorted indexes
+        over the roster. Rebuilt on the first call after the data changes,
+        unless update is given: then an edit made through upsert() patches the
+        value in place with update(value, record) instead.
+        """
+        version, df = self.snapshot()
+        cached = self._derived.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, build(df), update)
+            self._derived[name] = cached
+        return cached[1]
+
+    def upsert(self, record):
+        """
+        Writes one student through to the store and patches the cached frame
+        in place when no other writer got in between. Returns the new version.
+        """
+        record = normalize_record(record)
+        with self._lock:
+            before, after = self.store.upsert(record)
+            if self._df is not None and self._version == before:
+                self._apply(self._df, record)
+                self._version = after
+                for name, (version, value, update) in list(self._derived.items()):
+                    if update is not None and version == before:
+                        update(value, record)
+                        self._derived[name] = (after, value, update)
+            else:
+                # Someone else wrote in between; reload on the next read
+                self._version = None
+            return after
+
+    def _apply(self, df, record):
+        # Called under the lock; touches one row of df, never the whole frame
+        pos = self._index.get(record['StudentID'])
+        self._stats.update(df.iloc[pos] if pos is not None else None, record)
+        if self._search is not None:
+            self._search.add(record['StudentID'], record['StudentID'], record['Student'])
+        elif self._search_edits is not None:
+            self._search_edits.append(record)
+        if pos is None:
+            # A new student goes on the end
+            self._index[record['StudentID']] = len(df)
+            df.loc[len(df)] = [record.get(col) for col in df.columns]
+            return
+        # Cell by cell: a .loc row assignment on mixed dtypes rewrites whole columns
+        for col, value in record.items():
+            df.iat[pos, df.columns.get_loc(col)] = value
+
+
+def patch_search(index, old, new):
+    """Brings a search index built over frame old up to date with frame new."""
+    cols = ['StudentID', 'Student']
+    merged = old[cols].merge(new[cols], on='StudentID', how='outer', suffixes=('_old', ''), indicator=True)
+    for sid in merged.loc[merged['_merge'] == 'left_only', 'StudentID']:
+        index.remove(sid)
+    changed = (merged['_merge'] == 'right_only') | ((merged['_merge'] == 'both') & (merged['Student_old'] != merged['Student']))
+    for sid, name in zip(merged.loc[changed, 'StudentID'], merged.loc[changed, 'Student']):
+        index.add(sid, sid, name)
+
+
+_cohort = None
+_cohort_lock = threading.Lock()
+
+def get_cohort():
+    """Returns the process-wide cohort cache over the configured student store."""
+    global _cohort
+    if _cohort is None:
+        with _cohort_lock:
+            if _cohort is None:
+                _cohort = CohortCache()
+    return _cohort
@@ -0,0 +1,71 @@
+import copy
+import numpy as np
+
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+TIER_BINS = [0, 60, 70, 80, 90, 101]
+TIER_LABELS = ['Poor (<60)', 'Needs Improvement (60-69)', 'Average (70-79)', 'Good (80-89)', 'Excellent (90+)']
+
+def performance_tier(avg_scores):
+    """
+    Tier position for each (rounded) average, matching
+    pd.cut(right=False, bins=TIER_BINS); -1 means outside every bin.
+    """
+    avg_scores = np.asarray(avg_scores, dtype=float)
+    tiers = np.digitize(avg_scores, TIER_BINS, right=False) - 1
+    tiers[(avg_scores < TIER_BINS[0]) | (avg_scores >= TIER_BINS[-1]) | np.isnan(avg_scores)] = -1
+    return tiers
+
+class CohortAggregates:
+    """
+    Running totals behind the dashboard KPIs and charts: per-subject sums,
+    attendance sum, the sum of per-student rounded averages and tier counts.
+    Built once from a frame, then kept current in O(1) per changed row.
+    """
+    def __init__(self, df=None):
+        self.count = 0
+        self.subject_sums = np.zeros(len(SUBJECTS))
+        self.attendance_sum = 0.0
+        self.avg_score_sum = 0.0
+        self.tier_counts = np.zeros(len(TIER_LABELS), dtype=int)
+        if df is not None and len(df):
+            scores = df[SUBJECTS].to_numpy(dtype=float)
+            avg_scores = scores.mean(axis=1).round(1)
+            tiers = performance_tier(avg_scores)
+            self.count = len(df)
+            self.subject_sums = scores.sum(axis=0)
+            self.attendance_sum = float(df['Attendance'].sum())
+            self.avg_score_sum = float(avg_scores.sum())
+            self.tier_counts = np.bincount(tiers[tiers >= 0], minlength=len(TIER_LABELS))
+
+    def _add(self, row, sign):
+        scores = np.array([float(row[s]) for s in SUBJECTS])
+        avg_score = float(np.round(scores.mean(), 1))
+        tier = performance_tier([avg_score])[0]
+        self.count += sign
+        self.subject_sums += sign * scores
+        self.attendance_sum += sign * float(row['Attendance'])
+        self.avg_score_sum += sign * avg_score
+        if tier >= 0:
+            self.tier_counts[tier] += sign
+
+    def update(self, old_row, new_row):
+        """Swap one student's contribution; old_row is None for a new student."""
+        if old_row is not None:
+            self._add(old_row, -1)
+        self._add(new_row, 1)
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    # --- Derived values ---
+    def class_avg_score(self):
+        return self.avg_score_sum / self.count if self.count else 0.0
+
+    def avg_attendance(self):
+        return self.attendance_sum / self.count if self.count else 0.0
+
+    def subject_averages(self):
+        return dict(zip(SUBJECTS, self.subject_sums / self.count if self.count else self.subject_sums))
+
+    def tiers(self):
+        return dict(zip(TIER_LABELS, self.tier_counts.tolist()))
@@ -0,0 +1,184 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+from models.student_store import get_store
+
+DB_PATH = "data/feedback.db"
+# Whole-dict {student name: text} pickle used before the keyed store; imported once on first open
+LEGACY_PICKLE = "data/manual_feedback.pkl"
+FEEDBACK_COLUMNS = ['StudentID', 'Feedback', 'Source', 'UpdatedAt']
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+class FeedbackStore:
+    """
+    Per-student feedback in SQLite (WAL mode), keyed by StudentID so renamed
+    students keep their feedback and namesakes do not share it. Saving one
+    student is a single upsert in its own transaction, so the cost does not
+    grow with the number of stored entries and a crash cannot take the other
+    entries with it.
+    Every save is also appended to feedback_history with its source and time.
+    Nothing is read until asked for. `roster` returns the StudentID/Student
+    frame used to map the legacy pickle's names to IDs; it is only called
+    when there is a pickle to import.
+    """
+    def __init__(self, path=DB_PATH, legacy_pickle=LEGACY_PICKLE, roster=None):
+        self.path = path
+        self._roster = roster
+        self._local = threading.local()
+        self._init_db()
+        if legacy_pickle and os.path.exists(legacy_pickle):
+            self.migrate_pickle(legacy_pickle)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                "student_id TEXT PRIMARY KEY, text TEXT NOT NULL, source TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback_history ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT NOT NULL, text TEXT NOT NULL, "
+                "source TEXT NOT NULL, created_at TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_history_student ON feedback_history (student_id, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    # --- Reads ---
+    def get(self, student_id, default=""):
+        row = self._conn().execute("SELECT text FROM feedback WHERE student_id = ?", (student_id,)).fetchone()
+        return row[0] if row else default
+
+    def entry(self, student_id):
+        """Current feedback as {'student_id', 'text', 'source', 'updated_at'}, or None."""
+        row = self._conn().execute(
+            "SELECT student_id, text, source, updated_at FROM feedback WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        return dict(zip(['student_id', 'text', 'source', 'updated_at'], row)) if row else None
+
+    def history(self, student_id):
+        """Every saved version for a student, oldest first."""
+        rows = self._conn().execute(
+            "SELECT text, source, created_at FROM feedback_history WHERE student_id = ? ORDER BY id", (student_id,)
+        ).fetchall()
+        return [dict(zip(['text', 'source', 'created_at'], r)) for r in rows]
+
+    def get_many(self, student_ids):
+        """{student_id: text} for the given students that have feedback."""
+        student_ids = list(student_ids)
+        out = {}
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(student_ids), 500):
+            part = student_ids[i:i + 500]
+            out.update(self._conn().execute(
+                f"SELECT student_id, text FROM feedback WHERE student_id IN ({', '.join('?' * len(part))})", part
+            ))
+        return out
+
+    def all(self):
+        """{student_id: text} for everyone with feedback (one query, for exports)."""
+        return dict(self._conn().execute("SELECT student_id, text FROM feedback"))
+
+    def frame(self):
+        df = pd.read_sql_query("SELECT student_id, text, source, updated_at FROM feedback ORDER BY student_id", self._conn())
+        df.columns = FEEDBACK_COLUMNS
+        return df
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    # --- Writes ---
+    def set(self, student_id, text, source="manual"):
+        self.set_many([(student_id, text)], source)
+
+    def set_many(self, items, source="manual"):
+        """Upserts several (student_id, text) pairs in one transaction."""
+        stamp = _now()
+        rows = [(student_id, text, source, stamp) for student_id, text in items]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO feedback (student_id, text, source, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(student_id) DO UPDATE SET text = excluded.text, source = excluded.source, "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO feedback_history (student_id, text, source, created_at) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def migrate_pickle(self, path, roster=None):
+        """
+        Imports a legacy {student name: text} pickle once, keyed by the StudentID
+        each name has in roster (a StudentID/Student frame; the store's own
+        roster callable when omitted). Keys that
+        already are StudentIDs are kept; names that are unknown or shared by
+        several students cannot be placed and are skipped with a warning.
+        Returns the number of entries imported.
+        """
+        conn = self._conn()
+        key = f"migrated:{os.path.abspath(path)}"
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return 0
+        with open(path, "rb") as f:
+            legacy = pickle.load(f)
+        if roster is None:
+            roster = self._roster() if self._roster else pd.DataFrame(columns=['StudentID', 'Student'])
+        ids = legacy_key_map(roster)
+        # Entries already edited in the store win over the old pickle
+        existing = set(self.all())
+        items, skipped = [], []
+        for k, v in legacy.items():
+            student_id = ids.get(str(k))
+            if student_id is None:
+                skipped.append(str(k))
+            elif student_id not in existing:
+                items.append((student_id, str(v)))
+        if skipped:
+            logging.warning("Skipped %d legacy feedback entries with no unique StudentID: %s",
+                            len(skipped), ", ".join(skipped[:20]))
+        self.set_many(items, source="migrated")
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _now()))
+        return len(items)
+
+
+def legacy_key_map(roster):
+    """{legacy key: StudentID}: every StudentID to itself, plus each name borne by exactly one student."""
+    ids = roster['StudentID'].astype(str)
+    names = roster['Student'].astype(str)
+    unique = ~names.duplicated(keep=False)
+    out = dict(zip(names[unique], ids[unique]))
+    out.update(zip(ids, ids))
+    return out
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_feedback_store():
+    """Returns the process-wide feedback store, opening it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeedbackStore(roster=lambda: get_store().load()[['StudentID', 'Student']])
+    return _store
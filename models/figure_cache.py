@@ -0,0 +1,12 @@
+import json
+
+from models.lru_cache import LRUCache
+
+class FigureCache(LRUCache):
+    """
+    Bounded LRU of serialized Plotly figures keyed by (kind, scope, data version),
+    where scope is a StudentID or 'cohort'. A hit returns the stored figure dict
+    without touching Plotly; treat returned figures as read-only.
+    """
+    def figure(self, kind, scope, version, build):
+        return self.get_or_build((kind, scope, version), lambda: json.loads(build().to_json()))
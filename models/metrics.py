@@ -0,0 +1,286 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+# Seconds; from cached callbacks (about a millisecond) up to cold reloads of a large cohort
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Set by multi-worker deployments (gunicorn) so /metrics can add up every worker's numbers
+METRICS_DIR = os.environ.get('EDUSENSE_METRICS_DIR')
+FLUSH_INTERVAL = 5
+
+class Counter:
+    """Monotonic counter per label values."""
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def series(self):
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label values. observe() is one bisect and a
+    locked increment; buckets are made cumulative only when rendered.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    def series(self):
+        with self._lock:
+            return [[list(k), [list(counts), total]] for k, (counts, total) in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """
+    The process's metrics plus the caches whose hit rates are reported.
+    snapshot() is plain JSON, so worker processes can hand theirs to
+    whichever one serves /metrics (see METRICS_DIR).
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def register_cache(self, name, cache):
+        """Reports cache (anything with LRUCache.stats()) as edusense_cache_*{cache=name}."""
+        self.caches[name] = cache
+
+    def snapshot(self):
+        snap = {}
+        for m in list(self.metrics.values()):
+            snap[m.name] = {'type': m.type, 'help': m.help, 'labelnames': list(m.labelnames),
+                            'buckets': list(getattr(m, 'buckets', ())), 'series': m.series()}
+        stats = {name: cache.stats() for name, cache in list(self.caches.items())}
+        for key, kind, help in (('hits', 'counter', "Cache lookups that found an entry."),
+                                ('misses', 'counter', "Cache lookups that had to build the value."),
+                                ('size', 'gauge', "Entries currently held in the cache.")):
+            name = f"edusense_cache_{key}_total" if kind == 'counter' else "edusense_cache_entries"
+            snap[name] = {'type': kind, 'help': help, 'labelnames': ['cache'], 'buckets': [],
+                          'series': [[[cache], s[key]] for cache, s in stats.items()]}
+        return snap
+
+    def reset(self):
+        for m in list(self.metrics.values()):
+            m.reset()
+
+
+REGISTRY = Registry()
+
+def counter(name, help, labelnames=()):
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+def histogram(name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+def register_cache(name, cache):
+    REGISTRY.register_cache(name, cache)
+
+# --- Standard metrics ---
+CALLBACK_SECONDS = histogram('edusense_callback_duration_seconds', "Time spent in each Dash callback.", ['callback'])
+CALLBACK_ERRORS = counter('edusense_callback_errors_total', "Dash callbacks that raised.", ['callback'])
+CALLBACK_REQUEST_BYTES = counter('edusense_callback_request_bytes_total', "Request body bytes per Dash callback.", ['callback'])
+CALLBACK_RESPONSE_BYTES = counter('edusense_callback_response_bytes_total', "Response body bytes per Dash callback.", ['callback'])
+MODEL_SECONDS = histogram('edusense_model_duration_seconds', "Time spent in each model function.", ['function'])
+MODEL_ERRORS = counter('edusense_model_errors_total', "Model function calls that raised.", ['function'])
+
+def timed(hist, errors, label, ignore=()):
+    """Decorator recording each call's duration in hist{label} and exceptions (other than `ignore`) in errors{label}."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except ignore:
+                raise
+            except Exception:
+                errors.inc(1, label)
+                raise
+            finally:
+                hist.observe(time.perf_counter() - t0, label)
+        return wrapper
+    return decorate
+
+def timed_model(fn):
+    """Times a model function under edusense_model_duration_seconds{function=<its name>}."""
+    return timed(MODEL_SECONDS, MODEL_ERRORS, fn.__name__)(fn)
+
+# --- Exposition ---
+def merge(snapshots):
+    """Adds up snapshots from several processes, series by series."""
+    out = {}
+    for snap in snapshots:
+        for name, m in snap.items():
+            target = out.setdefault(name, dict(m, series={}))
+            for labels, value in m['series']:
+                key = tuple(labels)
+                prev = target['series'].get(key)
+                if prev is None:
+                    target['series'][key] = [list(value[0]), value[1]] if m['type'] == 'histogram' else value
+                elif m['type'] == 'histogram':
+                    prev[0] = [a + b for a, b in zip(prev[0], value[0])]
+                    prev[1] += value[1]
+                else:
+                    target['series'][key] = prev + value
+    return out
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _num(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+def render(merged):
+    """Prometheus text exposition format (0.0.4) for merged snapshots."""
+    hit_ratio = {}
+    lines = []
+    for name in sorted(merged):
+        m = merged[name]
+        lines.append(f"# HELP {name} {m['help']}")
+        lines.append(f"# TYPE {name} {m['type']}")
+        for labels, value in sorted(m['series'].items()):
+            if m['type'] == 'histogram':
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(m['buckets']) + ['+Inf'], counts):
+                    cumulative += count
+                    le = 'le="' + (bound if bound == '+Inf' else format(bound, 'g')) + '"'
+                    lines.append(f"{name}_bucket{_labels(m['labelnames'], labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(m['labelnames'], labels)} {_num(float(total))}")
+                lines.append(f"{name}_count{_labels(m['labelnames'], labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(m['labelnames'], labels)} {_num(value)}")
+    hits = merged.get('edusense_cache_hits_total', {}).get('series', {})
+    misses = merged.get('edusense_cache_misses_total', {}).get('series', {})
+    for key in sorted(hits):
+        total = hits[key] + misses.get(key, 0)
+        hit_ratio[key] = hits[key] / total if total else 0.0
+    if hit_ratio:
+        lines.append("# HELP edusense_cache_hit_ratio Share of cache lookups that found an entry.")
+        lines.append("# TYPE edusense_cache_hit_ratio gauge")
+        lines.extend(f"edusense_cache_hit_ratio{_labels(['cache'], key)} {_num(ratio)}" for key, ratio in hit_ratio.items())
+    return "\n".join(lines) + "\n"
+
+# --- Multi-process ---
+class SnapshotWriter:
+    """
+    Writes this process's snapshot to METRICS_DIR/<pid>.json every
+    FLUSH_INTERVAL seconds, so the worker answering /metrics can include the
+    others. Files of exited workers are kept, since their counters still
+    count; clear the directory when the server is restarted.
+    """
+    def __init__(self, directory, interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def path(self, pid=None):
+        return os.path.join(self.directory, f"{pid or os.getpid()}.json")
+
+    def flush(self):
+        tmp = self.path() + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(REGISTRY.snapshot(), f)
+        os.replace(tmp, self.path())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # Keep the thread alive; the next interval tries again
+                logging.exception("Metrics flush failed")
+
+    def others(self):
+        """Snapshots last written by the other processes."""
+        snaps = []
+        own = os.path.basename(self.path())
+        for entry in os.listdir(self.directory):
+            if entry.endswith(".json") and entry != own:
+                try:
+                    with open(os.path.join(self.directory, entry)) as f:
+                        snaps.append(json.load(f))
+                except (OSError, ValueError):
+                    pass
+        return snaps
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """The process's SnapshotWriter when METRICS_DIR is set, else None."""
+    global _writer
+    if METRICS_DIR and _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SnapshotWriter(METRICS_DIR).start()
+    return _writer
+
+def _after_fork():
+    # A forked worker (e.g. gunicorn --preload) starts from zero with its own flush thread
+    REGISTRY.reset()
+    if _writer is not None:
+        _writer._thread = None
+        _writer.start()
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def exposition():
+    """The text served at /metrics: this process, plus every other worker when METRICS_DIR is set."""
+    writer = get_writer()
+    snaps = [REGISTRY.snapshot()] + (writer.others() if writer else [])
+    return render(merge(snaps))
@@ -1,87 +1,197 @@
+import string
 import pandas as pd
 from textblob import TextBlob
 import numpy as np
 
+from models.metrics import timed_model
+
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+
+# --- Feedback text (shared by the per-row and batch paths) ---
+TIERS = ["Excellent", "Good", "Needs Improvement"]
+INTROS = {
+    "Excellent": "{name} is demonstrating exceptional academic mastery across the board.",
+    "Good": "{name} maintains a strong and consistent performance.",
+    "Needs Improvement": "While showing potential, {name} has several key areas for growth.",
+}
+SUMMARY_TOP = "Their top subject is {subject}, where they excel. "
+SUMMARY_WEAK = "Conversely, the main area for development is {subject}. "
+SUMMARY_ATTENDANCE = "Attendance is currently rated as {status}."
+TOP_ICON = "bi bi-trophy-fill text-warning"
+TOP_TEXT = "Top performance in {subject} with a score of {score}."
+WEAK_ICON = "bi bi-tools text-danger"
+WEAK_TEXT = "The primary focus should be on {subject}, currently at {score}."
+ATTENDANCE_GOOD_ICON = "bi bi-calendar-check-fill text-success"
+ATTENDANCE_GOOD_TEXT = "Exemplary attendance ({attendance}%) shows strong commitment."
+ATTENDANCE_POOR_ICON = "bi bi-calendar-x-fill text-danger"
+ATTENDANCE_POOR_TEXT = "Improving attendance from {attendance}% is a critical step for success."
+REMARKS_POSITIVE = {"icon": "bi bi-chat-heart-fill text-success",
+                    "text": "Teacher remarks note a positive attitude and active class engagement."}
+REMARKS_NEGATIVE = {"icon": "bi bi-chat-quote-fill text-warning",
+                    "text": "Remarks suggest some underlying challenges that could be addressed."}
+
+@timed_model
 def nlp_feedback(row):
     """
     Generates a highly detailed, structured analysis of student performance,
     including a narrative summary, key metrics, strengths, and growth areas.
     """
-    student_name = row['Student']
-    subjects = ['Math', 'Science', 'English', 'History', 'Art']
-    scores = {subject: row[subject] for subject in subjects}
+    scores = {subject: row[subject] for subject in SUBJECTS}
     avg_score = np.mean(list(scores.values()))
+    top_subject = max(scores, key=scores.get)
+    weakest_subject = min(scores, key=scores.get)
+
+    remarks = str(row.get('Remarks', ''))
+    sentiment = TextBlob(remarks).sentiment if remarks else None
+    polarity = sentiment.polarity if sentiment else 0
+    subjectivity = sentiment.subjectivity if sentiment else 0
+
+    return _build_feedback(
+        row['Student'], avg_score, top_subject, scores[top_subject], weakest_subject, scores[weakest_subject],
+        row['Attendance'], remarks, polarity, subjectivity
+    )
+
+@timed_model
+def nlp_feedback_batch(df):
+    """
+    Scores a whole cohort at once. Averages, top/weakest subjects, tiers,
+    attendance status and every summary and item text are built column-wise
+    from the same templates nlp_feedback uses, and each distinct remark is run
+    through TextBlob only once; the per-row work left is packing the columns
+    into dicts. Returns one (legacy_text, text_analytics, structured_feedback)
+    tuple per row, identical to calling nlp_feedback on each row.
+    """
+    n = len(df)
+    scores = df[SUBJECTS].to_numpy(dtype=float)
+    rows = np.arange(n)
+    avg_scores = scores.mean(axis=1)
+    top_idx = scores.argmax(axis=1)
+    weakest_idx = scores.argmin(axis=1)
+    top_scores = scores[rows, top_idx]
+    weakest_scores = scores[rows, weakest_idx]
+    attendance = df['Attendance'].to_numpy(dtype=float)
+
+    remarks = df['Remarks'].astype(str) if 'Remarks' in df.columns else pd.Series('', index=df.index)
+    codes, uniques = pd.factorize(remarks)
+    scored = np.zeros((len(uniques), 2))
+    for j, text in enumerate(uniques):
+        if text:
+            sentiment = TextBlob(text).sentiment
+            scored[j] = sentiment.polarity, sentiment.subjectivity
+    polarity, subjectivity = scored[codes, 0], scored[codes, 1]
 
+    # --- Column-wise analysis ---
+    names = df['Student'].astype(str).to_numpy(dtype=object)
+    subject_names = np.array(SUBJECTS, dtype=object)
+    top_subject = subject_names[top_idx]
+    weakest_subject = subject_names[weakest_idx]
+    tier = np.select([avg_scores >= 90, avg_scores >= 75], TIERS[:2], TIERS[2]).astype(object)
+    weak = weakest_scores < 70
+    attendance_status = np.select([attendance >= 95, attendance < 80],
+                                  ["Excellent", "Needs Improvement"], "Good").astype(object)
+    has_remarks = (remarks != '').to_numpy()
+    positive = has_remarks & (polarity > 0.2)
+    negative = has_remarks & ~(polarity > 0.2) & (polarity < -0.1)
+
+    intro = np.empty(n, dtype=object)
+    for t in TIERS:
+        rows_in_tier = tier == t
+        intro[rows_in_tier] = _fill(INTROS[t], name=names[rows_in_tier])
+    summary = (intro + " " + _fill(SUMMARY_TOP, subject=top_subject)
+               + np.where(weak, _fill(SUMMARY_WEAK, subject=weakest_subject), "").astype(object)
+               + _fill(SUMMARY_ATTENDANCE, status=np.char.lower(attendance_status.astype(str)).astype(object)))
+    top_text = _fill(TOP_TEXT, subject=top_subject, score=_ints(top_scores))
+    weak_text = _fill(WEAK_TEXT, subject=weakest_subject, score=_ints(weakest_scores))
+    attendance_good_text = _fill(ATTENDANCE_GOOD_TEXT, attendance=_ints(attendance))
+    attendance_poor_text = _fill(ATTENDANCE_POOR_TEXT, attendance=_ints(attendance))
+    focus = np.where(weak, weakest_subject, "None").astype(object)
+
+    # --- Assemble: only packing precomputed columns into dicts is left per row ---
+    out = []
+    for (text, pol, subj, t, top, f, status, top_t, is_weak, weak_t, att,
+         att_good_t, att_poor_t, pos, neg) in zip(
+        summary.tolist(), polarity.tolist(), subjectivity.tolist(), tier.tolist(), top_subject.tolist(),
+        focus.tolist(), attendance_status.tolist(), top_text.tolist(), weak.tolist(), weak_text.tolist(),
+        attendance.tolist(), attendance_good_text.tolist(), attendance_poor_text.tolist(),
+        positive.tolist(), negative.tolist(),
+    ):
+        strengths = [{"icon": TOP_ICON, "text": top_t}]
+        growth_areas = [{"icon": WEAK_ICON, "text": weak_t}] if is_weak else []
+        if att >= 95:
+            strengths.append({"icon": ATTENDANCE_GOOD_ICON, "text": att_good_t})
+        elif att < 80:
+            growth_areas.append({"icon": ATTENDANCE_POOR_ICON, "text": att_poor_t})
+        if pos:
+            strengths.append(dict(REMARKS_POSITIVE))
+        elif neg:
+            growth_areas.append(dict(REMARKS_NEGATIVE))
+        structured_feedback = {
+            "summary": text,
+            "metrics": {"Performance Tier": t, "Top Subject": top, "Area to Focus": f, "Attendance Status": status},
+            "strengths": strengths,
+            "growth_areas": growth_areas,
+        }
+        out.append((text, {"polarity": pol, "subjectivity": subj}, structured_feedback))
+    return out
+
+def _fill(template, **columns):
+    """template.format applied element-wise to object arrays of strings, as one concatenation per placeholder."""
+    out = ""
+    for literal, field, _, _ in string.Formatter().parse(template):
+        out = out + literal
+        if field is not None:
+            out = out + columns[field]
+    return out
+
+def _ints(values):
+    """Same text as f"{int(v)}" for each value, as an object array."""
+    return np.trunc(values).astype(np.int64).astype(str).astype(object)
+
+def _build_feedback(student_name, avg_score, top_subject, top_score, weakest_subject, weakest_score,
+                    attendance, remarks, polarity, subjectivity):
+    """Assembles the narrative and structured feedback for one student from precomputed metrics."""
     # --- Initialize Feedback Components ---
     strengths = []
     growth_areas = []
-    
+
     # --- Detailed Analysis ---
     # 1. Overall Performance Tier
     if avg_score >= 90:
         performance_tier = "Excellent"
-        summary_intro = f"{student_name} is demonstrating exceptional academic mastery across the board."
     elif avg_score >= 75:
         performance_tier = "Good"
-        summary_intro = f"{student_name} maintains a strong and consistent performance."
     else:
         performance_tier = "Needs Improvement"
-        summary_intro = f"While showing potential, {student_name} has several key areas for growth."
+    summary_intro = INTROS[performance_tier].format(name=student_name)
 
     # 2. Subject-Specific Analysis
-    top_subject = max(scores, key=scores.get)
-    top_score = scores[top_subject]
-    weakest_subject = min(scores, key=scores.get)
-    weakest_score = scores[weakest_subject]
-
-    strengths.append({
-        "icon": "bi bi-trophy-fill text-warning",
-        "text": f"Top performance in {top_subject} with a score of {int(top_score)}."
-    })
+    strengths.append({"icon": TOP_ICON, "text": TOP_TEXT.format(subject=top_subject, score=int(top_score))})
 
     if weakest_score < 70:
-        growth_areas.append({
-            "icon": "bi bi-tools text-danger",
-            "text": f"The primary focus should be on {weakest_subject}, currently at {int(weakest_score)}."
-        })
+        growth_areas.append({"icon": WEAK_ICON, "text": WEAK_TEXT.format(subject=weakest_subject, score=int(weakest_score))})
 
     # 3. Attendance Analysis
-    attendance = row['Attendance']
     if attendance >= 95:
         attendance_status = "Excellent"
-        strengths.append({
-            "icon": "bi bi-calendar-check-fill text-success",
-            "text": f"Exemplary attendance ({int(attendance)}%) shows strong commitment."
-        })
+        strengths.append({"icon": ATTENDANCE_GOOD_ICON, "text": ATTENDANCE_GOOD_TEXT.format(attendance=int(attendance))})
     elif attendance < 80:
         attendance_status = "Needs Improvement"
-        growth_areas.append({
-            "icon": "bi bi-calendar-x-fill text-danger",
-            "text": f"Improving attendance from {int(attendance)}% is a critical step for success."
-        })
+        growth_areas.append({"icon": ATTENDANCE_POOR_ICON, "text": ATTENDANCE_POOR_TEXT.format(attendance=int(attendance))})
     else:
         attendance_status = "Good"
 
     # 4. Remarks Analysis
-    remarks = str(row.get('Remarks', ''))
     if remarks:
-        polarity = TextBlob(remarks).sentiment.polarity
         if polarity > 0.2:
-            strengths.append({
-                "icon": "bi bi-chat-heart-fill text-success",
-                "text": "Teacher remarks note a positive attitude and active class engagement."
-            })
+            strengths.append(dict(REMARKS_POSITIVE))
         elif polarity < -0.1:
-            growth_areas.append({
-                "icon": "bi bi-chat-quote-fill text-warning",
-                "text": "Remarks suggest some underlying challenges that could be addressed."
-            })
+            growth_areas.append(dict(REMARKS_NEGATIVE))
 
     # --- Construct Narrative Summary ---
-    summary_body = f"Their top subject is {top_subject}, where they excel. "
+    summary_body = SUMMARY_TOP.format(subject=top_subject)
     if weakest_score < 70:
-        summary_body += f"Conversely, the main area for development is {weakest_subject}. "
-    summary_body += f"Attendance is currently rated as {attendance_status.lower()}."
+        summary_body += SUMMARY_WEAK.format(subject=weakest_subject)
+    summary_body += SUMMARY_ATTENDANCE.format(status=attendance_status.lower())
     narrative_summary = summary_intro + " " + summary_body
 
     # --- Final Structured Feedback ---
@@ -100,8 +210,8 @@ def nlp_feedback(row):
     # --- Maintain legacy return structure for compatibility ---
     legacy_feedback_text = narrative_summary
     text_analytics = {
-        "polarity": TextBlob(remarks).sentiment.polarity if remarks else 0,
-        "subjectivity": TextBlob(remarks).sentiment.subjectivity if remarks else 0,
+        "polarity": polarity,
+        "subjectivity": subjectivity,
     }
     
     return legacy_feedback_text, text_analytics, structured_feedback
@@ -1,74 +1,142 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from models.metrics import timed_model
+
+CATALOG_PATH = os.path.join("data", "resources.json")
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+# Scores below this count as a weak subject; the gap to it sets how much a subject's resources weigh
+PASS_MARK = 70
+PER_TYPE = 3
+# Catalog resource type -> group key used by the dashboard's Learning Resources tab
+TYPE_GROUPS = {'website': 'websites', 'video': 'videos', 'reading': 'reading'}
+
+class ResourceCatalog:
+    """
+    The learning-resource catalog (data/resources.json), indexed by id,
+    subject and type. Each resource has a `priority` (default 1.0) that
+    scales its ranking score.
+    """
+    def __init__(self, resources):
+        self.resources = [dict(r, priority=float(r.get('priority', 1.0))) for r in resources]
+        self.by_id = {r['id']: r for r in self.resources}
+        self.by_subject_type = {}
+        for r in self.resources:
+            self.by_subject_type.setdefault(r['subject'], {}).setdefault(r['type'], []).append(r)
+        # Column layout for batch ranking: one column per resource
+        subject_pos = {s: i for i, s in enumerate(SUBJECTS)}
+        known = [r for r in self.resources if r['subject'] in subject_pos]
+        self._columns = {
+            t: (np.array([subject_pos[r['subject']] for r in rs], dtype=int),
+                np.array([r['priority'] for r in rs]), rs)
+            for t in TYPE_GROUPS
+            for rs in [[r for r in known if r['type'] == t]]
+            if rs
+        }
+
+    def ranking_columns(self):
+        """
+        Yields (resource_type, subject_positions, priorities, resources) per
+        resource type: the catalog laid out as arrays, one entry per resource,
+        with subjects as positions in SUBJECTS.
+        """
+        for t, (subject_idx, priority, resources) in self._columns.items():
+            yield t, subject_idx, priority, resources
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['resources'])
+
+    def find(self, subject, resource_type=None):
+        types = self.by_subject_type.get(subject, {})
+        if resource_type:
+            return list(types.get(resource_type, []))
+        return [r for rs in types.values() for r in rs]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Returns the catalog, reading the JSON file once per process."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ResourceCatalog.load()
+    return _catalog
+
+# --- Ranking ---
+def subject_gaps(scores, pass_mark=PASS_MARK):
+    """
+    (n_students, n_subjects) array of how far each score is below pass_mark.
+    A student with no weak subject gets a gap of 1 on their weakest one, so
+    there is always something to recommend.
+    """
+    scores = np.asarray(scores, dtype=float).reshape(-1, len(SUBJECTS))
+    gaps = np.clip(pass_mark - scores, 0, None)
+    none_weak = ~gaps.any(axis=1)
+    gaps[none_weak, scores[none_weak].argmin(axis=1)] = 1.0
+    return gaps
+
+@timed_model
+def recommend_batch(df, pass_mark=PASS_MARK, per_type=PER_TYPE, key='StudentID'):
+    """
+    Ranks resources for every student in one pass. A resource scores
+    (gap in its subject) x priority, so all weak subjects contribute, the weakest most.
+    Returns {df[key]: {'subjects': [...], 'websites': [...], 'videos': [...], 'reading': [...]}}.
+    """
+    catalog = get_catalog()
+    gaps = subject_gaps(df[SUBJECTS].to_numpy(), pass_mark)
+    ranked = {}
+    for t, subject_idx, priority, resources in catalog.ranking_columns():
+        relevance = gaps[:, subject_idx] * priority
+        top = np.argsort(-relevance, axis=1, kind='stable')[:, :per_type]
+        ranked[TYPE_GROUPS[t]] = (top, np.take_along_axis(relevance, top, axis=1) > 0, resources)
+
+    subject_order = np.argsort(-gaps, axis=1, kind='stable')
+    out = {}
+    for i, student in enumerate(df[key]):
+        rec = {'subjects': [SUBJECTS[j] for j in subject_order[i] if gaps[i, j] > 0]}
+        for group in TYPE_GROUPS.values():
+            if group in ranked:
+                top, keep, resources = ranked[group]
+                rec[group] = [resources[j] for j, k in zip(top[i], keep[i]) if k]
+            else:
+                rec[group] = []
+        out[student] = rec
+    return out
+
+def update_recommendations(recs, record):
+    """Re-ranks one edited student inside a recommend_batch result (see CohortCache.derived)."""
+    recs.update(recommend_batch(pd.DataFrame([record])))
+
+def cohort_recommendations():
+    """
+    recommend_batch over the whole roster, cached per data version by the
+    cohort cache; edits saved through the app re-rank only the edited student.
+    """
+    from models.cohort_cache import get_cohort
+    return get_cohort().derived('recommendations', recommend_batch, update=update_recommendations)
+
+@timed_model
+def rank_resources(scores, pass_mark=PASS_MARK, per_type=PER_TYPE):
+    """Recommendations for one student from a {subject: score} mapping (or a row)."""
+    row = {s: [float(scores[s])] for s in SUBJECTS}
+    row['StudentID'] = [0]
+    return recommend_batch(pd.DataFrame(row), pass_mark, per_type)[0]
+
+@timed_model
 def recommend_resources(weakest_subject):
     """
     Provides a dictionary of detailed recommended resources for a student's weakest subject,
     including websites, videos, and reading materials with descriptions.
     """
-    resources = {
-        "Math": {
-            "websites": [
-                {"name": "Khan Academy", "url": "https://www.khanacademy.org/math", "description": "Comprehensive lessons, practice exercises, and quizzes for all math levels."},
-                {"name": "Brilliant.org", "url": "https://brilliant.org/courses/math-foundations/", "description": "Interactive problem-solving to build quantitative and mathematical intuition."},
-            ],
-            "videos": [
-                {"name": "3Blue1Brown: Essence of Algebra", "embed_url": "https://www.youtube.com/embed/videoseries?list=PLZHQObOWTQDPD3MizzM2xVFitgF8hE_ab"},
-                {"name": "The Organic Chemistry Tutor: Algebra Basics", "embed_url": "https://www.youtube.com/embed/NybHckSEQBI"},
-            ],
-            "reading": [
-                {"name": "OpenStax: Algebra and Trigonometry", "description": "A free, peer-reviewed online textbook covering core concepts."},
-            ]
-        },
-        "Science": {
-            "websites": [
-                {"name": "PhET Interactive Simulations", "url": "https://phet.colorado.edu/", "description": "Fun, free, interactive, research-based science and mathematics simulations."},
-                {"name": "NASA Science", "url": "https://science.nasa.gov/", "description": "Explore the latest news, images, and discoveries from NASA's science missions."},
-            ],
-            "videos": [
-                {"name": "CrashCourse Physics", "embed_url": "https://www.youtube.com/embed/videoseries?list=PL8dPuuaLjXtN0ge7yDk_UA0ldZJdhwkoV"},
-                {"name": "Kurzgesagt – In a Nutshell", "embed_url": "https://www.youtube.com/embed/0fKBhvDjuy0"},
-            ],
-            "reading": [
-                {"name": "National Geographic Science", "description": "In-depth articles on everything from space exploration to animal behavior."},
-            ]
-        },
-        "English": {
-            "websites": [
-                {"name": "Purdue Online Writing Lab (OWL)", "url": "https://owl.purdue.edu/", "description": "A comprehensive resource for writing, grammar, and citation style guides."},
-                {"name": "Grammarly Blog", "url": "https://www.grammarly.com/blog/", "description": "Tips and articles on grammar, spelling, punctuation, and effective writing."},
-            ],
-            "videos": [
-                {"name": "CrashCourse Literature", "embed_url": "https://www.youtube.com/embed/videoseries?list=PL8dPuuaLjXtOeEc9_iFq5v9-e_z2deA4-"},
-                {"name": "TED-Ed: Riddles", "embed_url": "https://www.youtube.com/embed/videoseries?list=PLJicmE8fK0Ei_6i2gL3r11S-n5x_s_4_i"},
-            ],
-            "reading": [
-                {"name": "Project Gutenberg", "description": "A library of over 60,000 free eBooks, including many classic literature titles."},
-            ]
-        },
-        "History": {
-            "websites": [
-                {"name": "History.com", "url": "https://www.history.com/", "description": "Watch full episodes of your favorite HISTORY shows and read articles on historical events."},
-                {"name": "World History Encyclopedia", "url": "https://www.worldhistory.org/", "description": "Peer-reviewed articles, maps, and timelines covering all periods of world history."},
-            ],
-            "videos": [
-                {"name": "CrashCourse World History", "embed_url": "https://www.youtube.com/embed/videoseries?list=PLBDA2E52FB1EF80C9"},
-                {"name": "OverSimplified", "embed_url": "https://www.youtube.com/embed/2N_g5jTT2_A"},
-            ],
-            "reading": [
-                {"name": "The Gilder Lehrman Institute of American History", "description": "Primary sources, essays, and multimedia on American history."},
-            ]
-        },
-        "Art": {
-            "websites": [
-                {"name": "Google Arts & Culture", "url": "https://artsandculture.google.com/", "description": "Explore high-resolution images and stories from cultural institutions around the world."},
-                {"name": "Artcyclopedia", "url": "http://www.artcyclopedia.com/", "description": "A comprehensive index of online museum-quality art."},
-            ],
-            "videos": [
-                {"name": "The Art Assignment (PBS)", "embed_url": "https://www.youtube.com/embed/videoseries?list=PL_w_qxa-x-4Vb950a3q2b-c8g5a4-C_4"},
-                {"name": "Tate: How to Paint Like...", "embed_url": "https://www.youtube.com/embed/videoseries?list=PLvAS0-niOb-0o0Gbo51sPLV9G0aO3uK7m"},
-            ],
-            "reading": [
-                {"name": "The Metropolitan Museum of Art's Heilbrunn Timeline of Art History", "description": "Thematic essays, chronologies, and works of art from the Met's collection."},
-            ]
-        }
-    }
-    
-    return resources.get(weakest_subject, None)
\ No newline at end of file
+    catalog = get_catalog()
+    if weakest_subject not in catalog.by_subject_type:
+        return None
+    return {group: catalog.find(weakest_subject, t) for t, group in TYPE_GROUPS.items()}
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+import joblib
+
+REGISTRY_DIR = os.path.join("models", "registry")
+# Pickles that predate the registry: read in place while nothing is registered,
+# and registered as a version by `python -m models.registry --import-legacy`
+LEGACY_ARTIFACTS = {
+    "risk": os.path.join("models", "risk_model.pkl"),
+    "feedback": os.path.join("models", "feedback_model.pkl"),
+}
+
+class ModelRegistry:
+    """
+    Versioned model artifacts on disk:
+
+        models/registry/<name>/v0001/model.joblib
+        models/registry/<name>/v0001/meta.json
+        models/registry/<name>/LATEST
+
+    Artifacts are written uncompressed so they can be loaded with mmap_mode:
+    plain numpy attributes (e.g. a linear model's coefficients) are then
+    mapped from the page cache and shared by every worker process. Tree
+    models are not: sklearn's Tree.__setstate__ copies the node arrays, so
+    each process holds its own copy of a forest and loads it once (get_model).
+    """
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, name, version=None):
+        path = os.path.join(self.root, name)
+        return os.path.join(path, f"v{version:04d}") if version is not None else path
+
+    def versions(self, name):
+        try:
+            entries = os.listdir(self._dir(name))
+        except FileNotFoundError:
+            return []
+        return sorted(int(e[1:]) for e in entries if e.startswith("v") and e[1:].isdigit())
+
+    def latest_version(self, name):
+        try:
+            with open(os.path.join(self._dir(name), "LATEST")) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def pointer_stamp(self, name):
+        """Cheap change token for the LATEST pointer (None if nothing is registered)."""
+        try:
+            st = os.stat(os.path.join(self._dir(name), "LATEST"))
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def register(self, name, model, metadata=None):
+        """
+        Writes a new version and points LATEST at it. Returns the version number.
+        metadata["sklearn_version"] overrides the installed version, for models built elsewhere.
+        """
+        import sklearn
+
+        with self._lock:
+            version = max(self.versions(name), default=0) + 1
+            while True:
+                # Another process may be registering at the same time; take the next free slot
+                try:
+                    path = self._dir(name, version)
+                    os.makedirs(path)
+                    break
+                except FileExistsError:
+                    version += 1
+            joblib.dump(model, os.path.join(path, "model.joblib"))
+            meta = {
+                "name": name,
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "sklearn_version": sklearn.__version__,
+                **(metadata or {}),
+            }
+            with open(os.path.join(path, "meta.json"), "w") as f:
+                json.dump(meta, f, indent=2)
+            # Swap the pointer with a rename so readers never see a half-written LATEST
+            tmp = os.path.join(self._dir(name), f"LATEST.tmp-{os.getpid()}")
+            with open(tmp, "w") as f:
+                f.write(str(version))
+            os.replace(tmp, os.path.join(self._dir(name), "LATEST"))
+            return version
+
+    def metadata(self, name, version=None):
+        version = version or self.latest_version(name)
+        if version is None:
+            return None
+        with open(os.path.join(self._dir(name, version), "meta.json")) as f:
+            return json.load(f)
+
+    def load(self, name, version=None, mmap_mode="r"):
+        """
+        Returns (model, metadata) for a version (default: latest), or (None, None).
+        Logs a warning when the version was built with another scikit-learn.
+        """
+        version = version or self.latest_version(name)
+        if version is None:
+            return None, None
+        model = joblib.load(os.path.join(self._dir(name, version), "model.joblib"), mmap_mode=mmap_mode)
+        meta = self.metadata(name, version)
+        _check_sklearn_version(f"{name} v{version}", meta.get("sklearn_version", "unknown"))
+        return model, meta
+
+    def import_legacy(self, name):
+        """
+        Registers a pre-registry pickle for `name`, if one exists, recording the
+        scikit-learn version it was built with. Returns the version or None.
+        """
+        model, meta = load_legacy(name)
+        if model is None:
+            return None
+        return self.register(name, model, {"source": meta["source"], "sklearn_version": meta["sklearn_version"]})
+
+
+def load_legacy(name):
+    """
+    Reads the pre-registry pickle for `name` without registering it. Returns
+    (model, metadata) or (None, None); metadata["sklearn_version"] is the version
+    the pickle was built with, or "unknown" when it cannot be told.
+    """
+    import sklearn
+    from sklearn.base import BaseEstimator
+
+    path = LEGACY_ARTIFACTS.get(name)
+    if not path or not os.path.exists(path):
+        return None, None
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        model = joblib.load(path)
+    # sklearn warns (InconsistentVersionWarning) when a pickle comes from another version
+    built_with = next((str(w.message.original_sklearn_version) for w in caught
+                       if hasattr(w.message, "original_sklearn_version")), None)
+    if built_with is None:
+        built_with = sklearn.__version__ if isinstance(model, BaseEstimator) else "unknown"
+    meta = {"name": name, "version": None, "source": path, "sklearn_version": built_with}
+    _check_sklearn_version(path, built_with)
+    return model, meta
+
+def _check_sklearn_version(label, built_with):
+    import sklearn
+
+    if built_with != sklearn.__version__:
+        logging.warning("%s was built with scikit-learn %s but %s is installed; predictions may differ.",
+                        label, built_with, sklearn.__version__)
+
+
+# --- Process-level cache ---
+_registry = ModelRegistry()
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+def get_registry():
+    return _registry
+
+def get_model(name):
+    """
+    Returns (model, metadata) for the latest registered version of `name`,
+    loading it at most once per process. A new load happens only when the
+    LATEST pointer changes on disk; otherwise this is a single os.stat.
+    While nothing is registered the legacy pickle, if any, is read in place;
+    registering it is a separate step (import_legacy), never a side effect.
+    """
+    stamp = _registry.pointer_stamp(name)
+    cached = _loaded.get(name)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+
+    with _loaded_lock:
+        cached = _loaded.get(name)
+        if cached is None or cached[0] != stamp:
+            model, meta = _registry.load(name) if stamp is not None else load_legacy(name)
+            cached = (stamp, model, meta)
+            _loaded[name] = cached
+        return cached[1], cached[2]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List registered models, or import the pre-registry pickles.")
+    parser.add_argument('names', nargs='*', default=sorted(LEGACY_ARTIFACTS))
+    parser.add_argument('--import-legacy', action='store_true',
+                        help="register each legacy pickle as a new version (once; skipped if already registered)")
+    args = parser.parse_args()
+
+    for model_name in args.names:
+        if args.import_legacy and _registry.latest_version(model_name) is None:
+            imported = _registry.import_legacy(model_name)
+            print(f"{model_name}: " + (f"imported as v{imported}" if imported else "no legacy pickle"))
+        latest = _registry.latest_version(model_name)
+        print(f"{model_name}: versions={_registry.versions(model_name)} latest={latest}")
+        if latest:
+            print(json.dumps(_registry.metadata(model_name), indent=2))
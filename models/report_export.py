@@ -0,0 +1,158 @@
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CHUNK_SIZE = 50
+
+def write_feedback_pdf(feedback_dict, target):
+    """Draws {name: feedback} onto a letter-size PDF; target is a path or a binary file object."""
+    # reportlab is imported here so importing this module stays cheap for the GUI
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    c = canvas.Canvas(target, pagesize=letter)
+    w, h = letter
+    c.setFont("Helvetica", 16)
+    y = h - 40
+    c.drawString(40, y, "EduSense: Personalized Feedback")
+    y -= 40
+    for name, fb in feedback_dict.items():
+        if y < 80:
+            c.showPage()
+            y = h - 40
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(40, y, name)
+        y -= 20
+        c.setFont("Helvetica", 12)
+        for line in fb.split("\n"):
+            c.drawString(60, y, line)
+            y -= 16
+        y -= 12
+    c.save()
+
+def render_report(name, feedback):
+    """One student's report as PDF bytes."""
+    buf = io.BytesIO()
+    write_feedback_pdf({name: feedback}, buf)
+    return buf.getvalue()
+
+def _render_chunk(items):
+    # Runs in a worker process; a chunk of students per task keeps IPC overhead low
+    return [(name, render_report(name, feedback)) for name, feedback in items]
+
+def report_filenames(names):
+    """Safe, unique archive member names ('Jane Doe.pdf', 'Jane Doe (2).pdf', ...)."""
+    seen = {}
+    out = []
+    for name in names:
+        base = re.sub(r'[\\/:*?"<>|\x00-\x1f]', "_", str(name)).strip() or "student"
+        seen[base] = seen.get(base, 0) + 1
+        out.append(f"{base}.pdf" if seen[base] == 1 else f"{base} ({seen[base]}).pdf")
+    return out
+
+def export_reports_zip(items, path, workers=None, chunk_size=CHUNK_SIZE, progress=None, cancelled=None):
+    """
+    Renders one PDF per (name, feedback) pair across a process pool and streams
+    them into a single zip at `path` as they finish. progress(done, total) is
+    called after each chunk; cancelled() is checked between chunks. The archive
+    is written to a temporary name and only moved into place when complete.
+    Returns the number of reports written (None if cancelled).
+    """
+    items = list(items)
+    filenames = report_filenames(name for name, _ in items)
+    chunks = [list(range(i, min(i + chunk_size, len(items)))) for i in range(0, len(items), chunk_size)]
+    tmp = f"{path}.part"
+    done = 0
+    workers = workers or os.cpu_count() or 1
+    ctx = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(chunks), 1)), mp_context=ctx) as pool, \
+                zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            futures = {pool.submit(_render_chunk, [items[i] for i in chunk]): chunk for chunk in chunks}
+            try:
+                for future in as_completed(futures):
+                    if cancelled and cancelled():
+                        break
+                    for i, (_, pdf) in zip(futures[future], future.result()):
+                        zf.writestr(filenames[i], pdf)
+                    done += len(futures[future])
+                    if progress:
+                        progress(done, len(items))
+            finally:
+                for future in futures:
+                    future.cancel()
+    except BaseException:
+        # A failed render or write leaves no half-written archive behind
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if done < len(items):
+        os.remove(tmp)
+        return None
+    os.replace(tmp, path)
+    return done
+
+
+class ReportExportJob:
+    """
+    Runs export_reports_zip on a background thread so the UI can poll
+    progress() and call cancel(). error holds the exception if it failed.
+    """
+    def __init__(self, items, path, workers=None):
+        items = list(items)
+        self.path = path
+        self.total = len(items)
+        self.completed = 0
+        self.written = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(items, workers), name="report-export", daemon=True)
+        self._thread.start()
+
+    def _run(self, items, workers):
+        try:
+            self.written = export_reports_zip(
+                items, self.path, workers=workers,
+                progress=lambda done, total: setattr(self, 'completed', done),
+                cancelled=self._cancel.is_set,
+            )
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def progress(self):
+        return self.completed / self.total if self.total else 1.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._done.is_set() and self.written is None and self.error is None
+
+    def done(self):
+        return self._done.is_set()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from models.feedback_store import get_feedback_store
+    from models.student_store import get_store
+
+    parser = argparse.ArgumentParser(description="Export one feedback PDF per student into a zip archive.")
+    parser.add_argument('path', nargs='?', default="reports.zip")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    stored = get_feedback_store().all()
+    roster = get_store().load()
+    start = time.perf_counter()
+    count = export_reports_zip([(n, stored.get(i, "")) for i, n in zip(roster['StudentID'], roster['Student'])], args.path, workers=args.workers,
+                               progress=lambda d, t: print(f"\r{d}/{t}", end="", flush=True))
+    print(f"\nWrote {count} reports to {args.path} in {time.perf_counter() - start:.1f}s.")
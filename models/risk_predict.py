@@ -1,31 +1,80 @@
-import os
+import warnings
 import numpy as np
-import joblib
-from sklearn.ensemble import RandomForestClassifier
+import pandas as pd
 
-MODEL_DIR = "models"
-MODEL_PATH = os.path.join(MODEL_DIR, "risk_model.pkl")
+from models.metrics import timed_model
+from models.registry import get_model, get_registry
 
-def train_risk_model(df, score_threshold=65, attendance_threshold=75):
+MODEL_NAME = "risk"
+FEATURES = ["Math", "Science", "English", "Attendance"]
+
+N_ESTIMATORS = 100
+TRAINING_STEPS = 10
+
+def risk_labels(X, score_threshold=65, attendance_threshold=75):
+    """The 'at-risk' condition the model learns: low core-subject average or low attendance."""
+    return ((X[["Math", "Science", "English"]].mean(axis=1) < score_threshold) | 
+            (X["Attendance"] < attendance_threshold)).astype(int)
+
+def fit_risk_model(X, y, n_jobs=None, progress=None, cancelled=None, steps=TRAINING_STEPS):
     """
-    Trains a RandomForest model to predict if a student is at risk.
-    Saves the trained model to a file.
+    Fits the forest in `steps` batches of trees using warm_start, calling
+    progress(fraction_done) after each batch. Returns None if cancelled()
+    becomes true between batches. The result equals a single fit with the same seed.
     """
-    if not os.path.exists(MODEL_DIR):
-        os.makedirs(MODEL_DIR)
+    from sklearn.ensemble import RandomForestClassifier
 
-    X = df[["Math", "Science", "English", "Attendance"]]
-    # Define 'at-risk' condition
-    y = ((X[["Math", "Science", "English"]].mean(axis=1) < score_threshold) | 
-         (X["Attendance"] < attendance_threshold)).astype(int)
+    clf = RandomForestClassifier(n_estimators=1, random_state=42, class_weight='balanced',
+                                 n_jobs=n_jobs, warm_start=True)
+    step = -(-N_ESTIMATORS // steps)
+    with warnings.catch_warnings():
+        # warm_start + 'balanced' warns about refitting on different data; we always refit on the same X, y
+        warnings.simplefilter('ignore', UserWarning)
+        for n_trees in range(step, N_ESTIMATORS + step, step):
+            if cancelled and cancelled():
+                return None
+            clf.set_params(n_estimators=min(n_trees, N_ESTIMATORS))
+            clf.fit(X, y)
+            if progress:
+                progress(clf.n_estimators / N_ESTIMATORS)
+    clf.set_params(warm_start=False)
+    return clf
+
+def training_metadata(X, score_threshold, attendance_threshold):
+    return {
+        "thresholds": {"score": score_threshold, "attendance": attendance_threshold},
+        "features": FEATURES,
+        "training_rows": int(len(X)),
+        "n_estimators": N_ESTIMATORS,
+    }
+
+def save_risk_model(clf, metadata=None):
+    """Registers the model as a new version in the model registry. Returns the version."""
+    return get_registry().register(MODEL_NAME, clf, metadata)
+
+def train_risk_model(df, score_threshold=65, attendance_threshold=75, n_jobs=-1):
+    """
+    Trains a RandomForest model to predict if a student is at risk.
+    Registers the trained model. Blocks until done; see train_risk_model_async.
+    """
+    X = df[FEATURES]
+    y = risk_labels(X, score_threshold, attendance_threshold)
     
-    clf = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
-    clf.fit(X, y)
+    clf = fit_risk_model(X, y, n_jobs=n_jobs)
     
-    joblib.dump(clf, MODEL_PATH)
-    print(f"Risk model trained with thresholds (Score<{score_threshold}, Att<{attendance_threshold}) and saved.")
+    version = save_risk_model(clf, training_metadata(X, score_threshold, attendance_threshold))
+    print(f"Risk model v{version} trained with thresholds (Score<{score_threshold}, Att<{attendance_threshold}) and saved.")
     return clf
 
+def train_risk_model_async(df, score_threshold=65, attendance_threshold=75, live_model=None, n_jobs=-1):
+    """
+    Starts training in a background process and returns a RiskTrainingJob
+    (progress, cancel, result). The finished model is swapped into live_model.
+    """
+    from models.risk_trainer import RiskTrainingJob
+    return RiskTrainingJob(df, score_threshold, attendance_threshold, live_model=live_model, n_jobs=n_jobs)
+
+@timed_model
 def predict_risk(row, clf):
     """
     Predicts risk for a single student row using a loaded classifier.
@@ -33,15 +82,37 @@ def predict_risk(row, clf):
     X_pred = np.array([[row['Math'], row['Science'], row['English'], row['Attendance']]])
     return bool(clf.predict(X_pred)[0])
 
+@timed_model
+def predict_risk_batch(df, clf):
+    """
+    Scores a whole cohort with one predict_proba call.
+    Returns a frame aligned to df.index with the at-risk probability ('RiskProb')
+    and the same flag predict_risk would give ('AtRisk'), plus StudentID when present.
+    """
+    scores = pd.DataFrame(index=df.index)
+    if 'StudentID' in df.columns:
+        scores['StudentID'] = df['StudentID'].astype(str)
+    if df.empty:
+        scores['RiskProb'] = pd.Series(dtype=float)
+        scores['AtRisk'] = pd.Series(dtype=bool)
+        return scores
+
+    proba = clf.predict_proba(df[FEATURES].astype(float))
+    classes = list(clf.classes_)
+    scores['RiskProb'] = proba[:, classes.index(1)] if 1 in classes else 0.0
+    scores['AtRisk'] = clf.classes_[proba.argmax(axis=1)] == 1
+    return scores
+
 def load_risk_model(df_for_training=None):
     """
-    Loads the risk model from file. If it doesn't exist, it trains a new one.
+    Returns the latest registered risk model, loaded once per process.
+    If none exists yet, it trains a new one.
     """
-    if os.path.exists(MODEL_PATH):
-        print("Loading existing risk model.")
-        return joblib.load(MODEL_PATH)
+    clf, _ = get_model(MODEL_NAME)
+    if clf is not None:
+        return clf
     elif df_for_training is not None:
         print("No risk model found. Training a new one with default thresholds.")
         return train_risk_model(df_for_training)
     else:
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,117 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from models.risk_predict import FEATURES, risk_labels, fit_risk_model, save_risk_model, training_metadata
+
+class LiveRiskModel:
+    """
+    The classifier currently serving predictions. A retrained model replaces
+    it in one step, so callers see either the old model or the new one.
+    """
+    def __init__(self, clf=None):
+        self._clf = clf
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            return self._clf
+
+    def swap(self, clf):
+        """Installs clf and returns the model it replaced."""
+        with self._lock:
+            old, self._clf = self._clf, clf
+        return old
+
+
+# --- Shared training process ---
+# One long-lived worker process, started with 'spawn' so it is clear of the GUI's
+# threads and Tk state. Progress and cancellation travel over a queue and a shared
+# value handed to the worker once at start-up, so submitting a job never blocks.
+_ctx = multiprocessing.get_context('spawn')
+_pool = None
+_pool_lock = threading.Lock()
+_progress_queue = None
+_cancel_id = None
+_progress = {}
+_job_ids = itertools.count(1)
+
+def _executor():
+    global _pool, _progress_queue, _cancel_id
+    with _pool_lock:
+        if _pool is None:
+            _progress_queue = _ctx.Queue()
+            _cancel_id = _ctx.Value('i', 0)
+            _pool = ProcessPoolExecutor(max_workers=1, mp_context=_ctx, initializer=_init_worker,
+                                        initargs=(_progress_queue, _cancel_id))
+        return _pool
+
+def _init_worker(progress_queue, cancel_id):
+    global _progress_queue, _cancel_id
+    _progress_queue, _cancel_id = progress_queue, cancel_id
+
+def _train_worker(job_id, X, y, n_jobs, metadata):
+    clf = fit_risk_model(
+        X, y, n_jobs=n_jobs,
+        progress=lambda fraction: _progress_queue.put((job_id, fraction)),
+        cancelled=lambda: _cancel_id.value == job_id,
+    )
+    if clf is not None:
+        save_risk_model(clf, metadata)
+    return clf
+
+def _drain_progress():
+    with _pool_lock:
+        try:
+            while True:
+                job_id, fraction = _progress_queue.get_nowait()
+                _progress[job_id] = fraction
+        except (queue.Empty, OSError, EOFError):
+            pass
+
+
+class RiskTrainingJob:
+    """
+    Trains a risk model in a background process with n_jobs parallel tree building.
+    Poll progress() from the UI and call cancel() to stop between tree batches.
+    On success the model is registered and swapped into live_model (if given);
+    until then live_model keeps serving the previous classifier.
+    """
+    def __init__(self, df, score_threshold=65, attendance_threshold=75, live_model=None, n_jobs=-1):
+        X = df[FEATURES].astype(float)
+        y = risk_labels(X, score_threshold, attendance_threshold)
+        self.live_model = live_model
+        self.job_id = next(_job_ids)
+        metadata = training_metadata(X, score_threshold, attendance_threshold)
+        self.future = _executor().submit(_train_worker, self.job_id, X, y, n_jobs, metadata)
+        self.future.add_done_callback(self._finished)
+
+    def progress(self):
+        """Fraction of trees built so far (0.0 - 1.0)."""
+        _drain_progress()
+        return _progress.get(self.job_id, 0.0)
+
+    def cancel(self):
+        if not self.future.cancel():
+            _cancel_id.value = self.job_id
+
+    def done(self):
+        return self.future.done()
+
+    def cancelled(self):
+        if self.future.cancelled():
+            return True
+        return self.future.done() and self.future.exception() is None and self.future.result() is None
+
+    def result(self, timeout=None):
+        """The trained classifier, or None if training was cancelled."""
+        return self.future.result(timeout)
+
+    def _finished(self, future):
+        _drain_progress()
+        if not future.cancelled() and future.exception() is None:
+            clf = future.result()
+            if clf is not None and self.live_model is not None:
+                self.live_model.swap(clf)
@@ -0,0 +1,123 @@
+import math
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+# Columns that get a presorted index as soon as the roster is built
+PRESORTED = ['AvgScore', 'Attendance', 'Student']
+# The table shows a markdown link for the name; sort and filter on the plain name instead
+COLUMN_ALIASES = {'StudentLink': 'Student'}
+
+FILTER_OPERATORS = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'], ['ne ', '!='], ['eq ', '='],
+                    ['contains '], ['datestartswith ']]
+
+def split_filter_part(filter_part):
+    """Parse one 'and' clause of a DataTable filter_query into (column, operator, value)."""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                # word operators need spaces after them in the filter string,
+                # but we don't want these later
+                return name, operator_type[0].strip(), value
+
+    return [None] * 3
+
+
+class RosterIndex:
+    """
+    Roster frame plus presorted position arrays for server-side paging.
+    Built once per data version; each page request only touches the rows it returns
+    (plus one vectorized mask when a filter is active). Cached risk scores, if
+    given, are joined on StudentID; unscored students get NaN.
+    """
+    def __init__(self, df, risk=None):
+        frame = df.reset_index(drop=True).copy()
+        frame['AvgScore'] = frame[SUBJECTS].mean(axis=1).round(1)
+        if risk is not None and len(risk):
+            risk = risk.set_index('StudentID')
+            frame['RiskPct'] = (frame['StudentID'].map(risk['RiskProb']) * 100).round(0)
+            frame['AtRisk'] = frame['StudentID'].map(risk['AtRisk']).astype(float)
+        else:
+            frame['RiskPct'] = np.nan
+            frame['AtRisk'] = np.nan
+        self.frame = frame
+        self._orders = {}
+        for col in PRESORTED:
+            self.order(col)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def order(self, column):
+        """Ascending row positions for a column, computed once per index."""
+        column = COLUMN_ALIASES.get(column, column)
+        if column not in self._orders:
+            values = self.frame[column]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = values.astype(str).str.lower()
+            self._orders[column] = np.argsort(values.to_numpy(), kind='mergesort')
+        return self._orders[column]
+
+    def filter_mask(self, filter_query):
+        mask = np.ones(len(self.frame), dtype=bool)
+        for part in (filter_query or '').split(' && '):
+            col_name, operator, value = split_filter_part(part)
+            col_name = COLUMN_ALIASES.get(col_name, col_name)
+            if col_name not in self.frame.columns:
+                continue
+            col = self.frame[col_name]
+            if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+                if pd.api.types.is_numeric_dtype(col) and isinstance(value, str):
+                    continue
+                cmp = {'eq': col.__eq__, 'ne': col.__ne__, 'lt': col.__lt__,
+                       'le': col.__le__, 'gt': col.__gt__, 'ge': col.__ge__}[operator]
+                mask &= cmp(value).to_numpy()
+            elif operator == 'contains':
+                mask &= col.astype(str).str.contains(str(value), case=False, regex=False).to_numpy()
+            elif operator == 'datestartswith':
+                mask &= col.astype(str).str.startswith(str(value)).to_numpy()
+        return mask
+
+    def search_mask(self, student_ids):
+        """Boolean row mask for a list of StudentIDs (e.g. search results)."""
+        # isin, not an index lookup: a roster that was never keyed (e.g. a raw CSV) may repeat an ID
+        return self.frame['StudentID'].isin(student_ids).to_numpy()
+
+    def page(self, page_current=0, page_size=10, sort_by=None, filter_query='', student_ids=None):
+        """
+        Returns (rows, page_count, page_current) for the requested slice of the
+        roster. student_ids, if given, restricts the rows to those students
+        (search results). A page past the end (e.g. after a filter shrank the
+        roster) is clamped to the last one, and the page actually used is returned.
+        """
+        sort_column = COLUMN_ALIASES.get(sort_by[0]['column_id'], sort_by[0]['column_id']) if sort_by else None
+        if sort_column in self.frame.columns:
+            positions = self.order(sort_column)
+            if sort_by[0]['direction'] == 'desc':
+                positions = positions[::-1]
+        else:
+            positions = np.arange(len(self.frame))
+
+        if filter_query:
+            positions = positions[self.filter_mask(filter_query)[positions]]
+        if student_ids is not None:
+            positions = positions[self.search_mask(student_ids)[positions]]
+
+        page_count = max(1, math.ceil(len(positions) / page_size))
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+        start = page_current * page_size
+        rows = self.frame.iloc[positions[start: start + page_size]]
+        return rows, page_count, page_current
@@ -0,0 +1,171 @@
+import bisect
+import threading
+
+GRAM = 3
+# Separates the indexed fields of one key, so a match cannot span two of them
+FIELD_SEP = "\x00"
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+def grams(text):
+    """Every substring of length 1..GRAM; a query of up to GRAM characters is a single lookup."""
+    out = set()
+    for n in range(1, GRAM + 1):
+        out.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return out
+
+def prefixes(text):
+    """Prefixes (up to GRAM characters) of each word, used to rank word-start matches first."""
+    return {word[:n] for word in text.split() for n in range(1, min(len(word), GRAM) + 1)}
+
+def starts_word(text, q):
+    """True if q occurs in text at the start of a word."""
+    return text.startswith(q) or (" " + q) in text or (FIELD_SEP + q) in text
+
+class SearchIndex:
+    """
+    Substring search over student names and IDs.
+
+    Each key (usually the StudentID) gets a sequence number in insertion
+    order and is indexed by its character n-grams (1..3) and its word
+    prefixes. Postings are lists of sequence numbers kept sorted, so they
+    are already in result order: a query of up to three characters is one
+    lookup, with word-start matches (the prefix posting) listed first, and
+    a limit only walks as far as it needs. Longer queries check the
+    candidates of their rarest trigram with a substring test. Entries are
+    added, replaced and removed individually, so an edit never rebuilds
+    the index.
+    """
+    def __init__(self):
+        self._seq = {}       # key -> sequence number
+        self._keys = []      # sequence number -> key (None once removed)
+        self._texts = []     # sequence number -> indexed text
+        self._grams = {}
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_pairs(cls, keys, *fields):
+        """Builds an index from parallel sequences: keys plus one or more text fields."""
+        index = cls()
+        seen = index._seq
+        gram_postings, prefix_postings = index._grams, index._prefixes
+        for key, *texts in zip(keys, *fields):
+            if key in seen:
+                index.add(key, *texts)
+                continue
+            text = FIELD_SEP.join(normalize(t) for t in texts)
+            seq = len(index._keys)
+            seen[key] = seq
+            index._keys.append(key)
+            index._texts.append(text)
+            # Sequence numbers only grow here, so appending keeps every posting sorted
+            for g in grams(text):
+                gram_postings.setdefault(g, []).append(seq)
+            for p in prefixes(text):
+                prefix_postings.setdefault(p, []).append(seq)
+        return index
+
+    def __len__(self):
+        return len(self._seq)
+
+    def __contains__(self, key):
+        return key in self._seq
+
+    def add(self, key, *texts):
+        """Indexes key under the given texts, replacing any previous entry (which keeps its position)."""
+        text = FIELD_SEP.join(normalize(t) for t in texts)
+        with self._lock:
+            seq = self._seq.get(key)
+            if seq is None:
+                seq = self._seq[key] = len(self._keys)
+                self._keys.append(key)
+                self._texts.append(text)
+                old_grams, old_prefixes = set(), set()
+            elif self._texts[seq] == text:
+                return
+            else:
+                old_grams, old_prefixes = grams(self._texts[seq]), prefixes(self._texts[seq])
+                self._texts[seq] = text
+            new_grams, new_prefixes = grams(text), prefixes(text)
+            self._unpost(self._grams, old_grams - new_grams, seq)
+            self._unpost(self._prefixes, old_prefixes - new_prefixes, seq)
+            self._post(self._grams, new_grams - old_grams, seq)
+            self._post(self._prefixes, new_prefixes - old_prefixes, seq)
+
+    def remove(self, key):
+        with self._lock:
+            seq = self._seq.pop(key, None)
+            if seq is not None:
+                text = self._texts[seq]
+                self._unpost(self._grams, grams(text), seq)
+                self._unpost(self._prefixes, prefixes(text), seq)
+                self._keys[seq] = None
+                self._texts[seq] = ""
+
+    @staticmethod
+    def _post(table, parts, seq):
+        for part in parts:
+            posting = table.setdefault(part, [])
+            if not posting or posting[-1] < seq:
+                posting.append(seq)
+            else:
+                bisect.insort(posting, seq)
+
+    @staticmethod
+    def _unpost(table, parts, seq):
+        for part in parts:
+            posting = table.get(part)
+            if posting is None:
+                continue
+            i = bisect.bisect_left(posting, seq)
+            if i < len(posting) and posting[i] == seq:
+                del posting[i]
+                if not posting:
+                    del table[part]
+
+    def search(self, query, limit=None):
+        """
+        Keys whose name or ID contains query (case-insensitive), word-start
+        matches first, then in insertion order. An empty query returns None
+        (meaning: no filter).
+        """
+        q = normalize(query)
+        if not q:
+            return None
+        with self._lock:
+            texts = self._texts
+            if len(q) <= GRAM:
+                matches = self._grams.get(q, [])
+                if " " not in q:
+                    starts = self._prefixes.get(q, [])
+                else:
+                    starts = [s for s in matches if starts_word(texts[s], q)]
+            else:
+                rarest = min((self._grams.get(q[i:i + GRAM], []) for i in range(len(q) - GRAM + 1)), key=len)
+                matches = [s for s in rarest if q in texts[s]]
+                starts = [s for s in matches if starts_word(texts[s], q)]
+            ranked = _word_starts_first(matches, starts, limit)
+            return [self._keys[s] for s in ranked]
+
+def _word_starts_first(matches, starts, limit=None):
+    """starts (a sorted subset of the sorted matches) followed by the rest of matches, cut at limit."""
+    if limit and len(starts) >= limit:
+        return starts[:limit]
+    if not limit:
+        if not starts:
+            return list(matches)
+        skip = set(starts)
+        return list(starts) + [s for s in matches if s not in skip]
+    out = list(starts)
+    j, n = 0, len(starts)
+    for s in matches:
+        if limit and len(out) >= limit:
+            break
+        while j < n and starts[j] < s:
+            j += 1
+        if j < n and starts[j] == s:
+            continue
+        out.append(s)
+    return out
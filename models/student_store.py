@@ -0,0 +1,292 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+# --- Constants ---
+CSV_PATH = "data/students.csv"
+DB_PATH = "data/students.db"
+RISK_CSV_PATH = "data/risk_scores.csv"
+SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
+COLUMNS = ['StudentID', 'Student'] + SUBJECTS + ['Attendance', 'Remarks', 'PhotoURL']
+TEXT_COLUMNS = ['StudentID', 'Student', 'Remarks', 'PhotoURL']
+NUMERIC_COLUMNS = SUBJECTS + ['Attendance']
+RISK_COLUMNS = ['StudentID', 'RiskProb', 'AtRisk']
+
+def normalize_frame(df):
+    """Apply the roster column fix-ups: missing columns, blanks and dtypes."""
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = '' if col in TEXT_COLUMNS else 0
+
+    df['Remarks'] = df['Remarks'].fillna('')
+    df['PhotoURL'] = df['PhotoURL'].fillna('')
+    df.fillna(0, inplace=True)
+
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].astype(float)
+    # Blank text cells were just filled with 0; store them as text like the SQLite backend does
+    df[TEXT_COLUMNS] = df[TEXT_COLUMNS].astype(str)
+    return df
+
+def normalize_record(record):
+    """Coerce a single student dict to the roster schema."""
+    clean = {}
+    for col in COLUMNS:
+        value = record.get(col)
+        if col in NUMERIC_COLUMNS:
+            clean[col] = float(value or 0)
+        else:
+            clean[col] = '' if value is None else str(value)
+    return clean
+
+def empty_frame():
+    return pd.DataFrame(columns=COLUMNS)
+
+def normalize_risk(scores):
+    scores = scores[RISK_COLUMNS].copy()
+    scores['StudentID'] = scores['StudentID'].astype(str)
+    scores['RiskProb'] = scores['RiskProb'].astype(float)
+    scores['AtRisk'] = scores['AtRisk'].astype(bool)
+    return scores.drop_duplicates('StudentID', keep='last')
+
+
+class CSVStudentStore:
+    """
+    Legacy backend: the whole roster lives in one CSV file.
+    Every write rewrites the file, so prefer SQLiteStudentStore for real cohorts.
+    StudentID is treated as a key like the SQLite table's primary key: when
+    the file repeats an ID, the last row wins.
+    """
+    def __init__(self, path=CSV_PATH, risk_path=RISK_CSV_PATH):
+        self.path = path
+        self.risk_path = risk_path
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            df = normalize_frame(pd.read_csv(self.path))
+        except FileNotFoundError:
+            return empty_frame()
+        return df.drop_duplicates('StudentID', keep='last').reset_index(drop=True)
+
+    def save(self, df):
+        df = normalize_frame(df.copy()).drop_duplicates('StudentID', keep='last')
+        with self._lock:
+            df[COLUMNS].to_csv(self.path, index=False)
+            if os.path.exists(self.risk_path):
+                os.remove(self.risk_path)
+
+    def iter_chunks(self, chunk_size=1000):
+        """Yields the roster in normalized frames of at most chunk_size rows."""
+        try:
+            for chunk in pd.read_csv(self.path, chunksize=chunk_size):
+                yield normalize_frame(chunk)
+        except FileNotFoundError:
+            return
+
+    def get(self, student_id):
+        df = self.load()
+        match = df[df['StudentID'] == str(student_id)]
+        return match.iloc[0].to_dict() if len(match) else None
+
+    def upsert(self, record):
+        """Insert or update one student. Returns (version_before, version_after)."""
+        record = normalize_record(record)
+        with self._lock:
+            before = self.version()
+            df = self.load()
+            mask = df['StudentID'] == record['StudentID']
+            if mask.any():
+                df.loc[mask, COLUMNS] = [record[c] for c in COLUMNS]
+            else:
+                df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
+            df[COLUMNS].to_csv(self.path, index=False)
+            self._drop_risk(record['StudentID'])
+            return before, self.version()
+
+    def version(self):
+        """Data version token; the file mtime is good enough for CSV."""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def load_risk(self):
+        try:
+            return normalize_risk(pd.read_csv(self.risk_path))
+        except FileNotFoundError:
+            return pd.DataFrame(columns=RISK_COLUMNS)
+
+    def save_risk(self, scores):
+        """Replace the cached risk scores (StudentID, RiskProb, AtRisk)."""
+        with self._lock:
+            normalize_risk(scores).to_csv(self.risk_path, index=False)
+            # Touch the roster so its version moves on with the new scores (no roster yet, no version to move)
+            if os.path.exists(self.path):
+                os.utime(self.path)
+
+    def _drop_risk(self, student_id):
+        risk = self.load_risk()
+        if (risk['StudentID'] == student_id).any():
+            risk[risk['StudentID'] != student_id].to_csv(self.risk_path, index=False)
+
+    def import_csv(self, path):
+        self.save(normalize_frame(pd.read_csv(path)))
+
+    def export_csv(self, path):
+        self.load().to_csv(path, index=False)
+
+
+class SQLiteStudentStore:
+    """
+    Roster stored in SQLite with StudentID as the primary key.
+    Edits upsert a single row instead of rewriting the roster, and WAL mode
+    lets readers carry on while a write is in progress.
+    """
+    def __init__(self, path=DB_PATH, seed_csv=CSV_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._init_db()
+        if seed_csv and os.path.exists(seed_csv) and self.count() == 0:
+            self.import_csv(seed_csv)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        cols = ", ".join(
+            f"{c} REAL NOT NULL DEFAULT 0" if c in NUMERIC_COLUMNS else f"{c} TEXT NOT NULL DEFAULT ''"
+            for c in COLUMNS[1:]
+        )
+        conn = self._conn()
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS students (StudentID TEXT PRIMARY KEY, {cols})")
+            conn.execute("CREATE TABLE IF NOT EXISTS risk_scores (StudentID TEXT PRIMARY KEY, RiskProb REAL NOT NULL, AtRisk INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def load(self):
+        df = pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM students ORDER BY rowid", self._conn())
+        return normalize_frame(df)
+
+    def iter_chunks(self, chunk_size=1000):
+        """Yields the roster in normalized frames of at most chunk_size rows."""
+        query = f"SELECT {', '.join(COLUMNS)} FROM students ORDER BY rowid"
+        for chunk in pd.read_sql_query(query, self._conn(), chunksize=chunk_size):
+            yield normalize_frame(chunk)
+
+    def save(self, df):
+        """Replace the whole roster (bulk import); use upsert() for single edits."""
+        df = normalize_frame(df.copy()).drop_duplicates('StudentID', keep='last')
+        rows = df[COLUMNS].itertuples(index=False, name=None)
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM students")
+            conn.execute("DELETE FROM risk_scores")
+            conn.executemany(
+                f"INSERT INTO students ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+            )
+            self._bump_version(conn)
+
+    def get(self, student_id):
+        cur = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM students WHERE StudentID = ?", (str(student_id),)
+        )
+        row = cur.fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def upsert(self, record):
+        """
+        Insert or update one student by StudentID in a single transaction.
+        Returns (version_before, version_after) so callers can tell whether
+        anyone else wrote in between.
+        """
+        record = normalize_record(record)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT INTO students ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                f"ON CONFLICT(StudentID) DO UPDATE SET {updates}",
+                [record[c] for c in COLUMNS],
+            )
+            # The cached risk score no longer matches the edited row
+            conn.execute("DELETE FROM risk_scores WHERE StudentID = ?", (record['StudentID'],))
+            self._bump_version(conn)
+            after = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        return after - 1, after
+
+    def version(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def load_risk(self):
+        df = pd.read_sql_query(f"SELECT {', '.join(RISK_COLUMNS)} FROM risk_scores", self._conn())
+        return normalize_risk(df)
+
+    def save_risk(self, scores):
+        """Replace the cached risk scores (StudentID, RiskProb, AtRisk)."""
+        scores = normalize_risk(scores)
+        rows = zip(scores['StudentID'], scores['RiskProb'].tolist(), scores['AtRisk'].astype(int).tolist())
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM risk_scores")
+            conn.executemany("INSERT INTO risk_scores (StudentID, RiskProb, AtRisk) VALUES (?, ?, ?)", rows)
+            self._bump_version(conn)
+
+    def import_csv(self, path):
+        self.save(pd.read_csv(path))
+
+    def export_csv(self, path):
+        self.load().to_csv(path, index=False)
+
+
+# --- Backend selection ---
+BACKENDS = {'sqlite': SQLiteStudentStore, 'csv': CSVStudentStore}
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Returns the process-wide student store. The backend is chosen with the
+    EDUSENSE_STORE environment variable ('sqlite' by default, or 'csv').
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.environ.get('EDUSENSE_STORE', 'sqlite').lower()
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown EDUSENSE_STORE backend: {backend}")
+                _store = BACKENDS[backend]()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import or export the student roster as CSV.")
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('path', nargs='?', default=CSV_PATH)
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.action == 'import':
+        store.import_csv(args.path)
+        print(f"Imported {args.path} ({store.load().shape[0]} students).")
+    else:
+        store.export_csv(args.path)
+        print(f"Exported roster to {args.path}.")
@@ -1,30 +1,110 @@
+import hashlib
+import threading
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
+from models.lru_cache import LRUCache
+
+TOP_WORDS = 5
+# Refit from scratch once the corpus has grown this much past the fitted vocabulary
+REFIT_GROWTH = 2.0
+
+def corpus_hash(docs):
+    h = hashlib.sha1()
+    for d in docs:
+        h.update(d.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+class _FittedTopics:
+    """Vectorizer + online LDA for one n_topics, plus the corpus they have seen."""
+    def __init__(self, n_docs, prefix_hash, vectorizer, lda, vocab_docs):
+        self.n_docs = n_docs
+        self.prefix_hash = prefix_hash
+        self.vectorizer = vectorizer
+        self.lda = lda
+        self.vocab_docs = vocab_docs
+
+class TopicService:
+    """
+    LDA topics over teacher remarks without refitting on every request.
+
+    - Results are cached by (corpus hash, n_topics), so an unchanged corpus is a lookup.
+    - When the corpus only grew (the old documents are an unchanged prefix), the new
+      remarks are folded in with partial_fit (online LDA) against the fitted vocabulary.
+    - Anything else, or a corpus that has outgrown its vocabulary, is a full fit.
+    Fitting uses n_jobs worker processes.
+    """
+    def __init__(self, n_jobs=-1, cache_size=32):
+        self.n_jobs = n_jobs
+        self._cache = LRUCache(cache_size)
+        self._fitted = {}
+        self._lock = threading.Lock()
+
+    def topics(self, docs, n_topics=3):
+        """
+        Top words per topic, as ["w1, w2, ...", ...].
+        Raises ValueError with a readable message when there is too little text.
+        """
+        docs = [d if isinstance(d, str) else "" for d in docs]
+        if not docs or all(d.strip() == "" for d in docs):
+            raise ValueError("Not enough text data to generate topics.")
+        key = (corpus_hash(docs), n_topics)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            state = self._update(docs, n_topics)
+            words = state.vectorizer.get_feature_names_out()
+            result = [", ".join(words[i] for i in topic.argsort()[:-TOP_WORDS - 1:-1])
+                      for topic in state.lda.components_]
+        self._cache.put(key, result)
+        return result
+
+    def _update(self, docs, n_topics):
+        state = self._fitted.get(n_topics)
+        if (state is not None and state.n_docs < len(docs) <= state.vocab_docs * REFIT_GROWTH
+                and corpus_hash(docs[:state.n_docs]) == state.prefix_hash):
+            X_new = state.vectorizer.transform(docs[state.n_docs:])
+            if X_new.nnz:
+                state.lda.set_params(total_samples=len(docs))
+                state.lda.partial_fit(X_new)
+            state.n_docs = len(docs)
+            state.prefix_hash = corpus_hash(docs)
+            return state
+
+        vectorizer = CountVectorizer(stop_words='english', max_df=0.9, min_df=2)
+        try:
+            X = vectorizer.fit_transform(docs)
+        except ValueError:
+            raise ValueError("Text is too sparse to find topics. Need more unique words.") from None
+        if X.shape[1] == 0:
+            raise ValueError("No relevant vocabulary found after filtering stop words.")
+        lda = LatentDirichletAllocation(
+            n_components=n_topics, learning_method='online', total_samples=len(docs),
+            random_state=42, n_jobs=self.n_jobs,
+        )
+        lda.fit(X)
+        state = _FittedTopics(len(docs), corpus_hash(docs), vectorizer, lda, len(docs))
+        self._fitted[n_topics] = state
+        return state
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._fitted.clear()
+
+
+_service = TopicService()
+
+def get_topic_service():
+    return _service
 
 def get_topics(docs, n_topics=3):
     """
     Performs Latent Dirichlet Allocation (LDA) to find topics in documents.
     """
-    if not docs or all(d.strip() == "" for d in docs):
-        return ["Not enough text data to generate topics."]
-        
-    vectorizer = CountVectorizer(stop_words='english', max_df=0.9, min_df=2)
     try:
-        X = vectorizer.fit_transform(docs)
-    except ValueError:
-        return ["Text is too sparse to find topics. Need more unique words."]
-
-    if X.shape[1] == 0:
-        return ["No relevant vocabulary found after filtering stop words."]
-
-    lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
-    lda.fit(X)
-    
-    words = vectorizer.get_feature_names_out()
-    topics = []
-    for idx, topic in enumerate(lda.components_):
-        top_words_idx = topic.argsort()[:-6:-1] # Get top 5 words
-        top_words = [words[i] for i in top_words_idx]
-        topics.append(f"Topic {idx + 1}: {', '.join(top_words)}")
-        
-    return topics
\ No newline at end of file
+        topics = _service.topics(docs, n_topics)
+    except ValueError as e:
+        return [str(e)]
+    return [f"Topic {idx + 1}: {words}" for idx, words in enumerate(topics)]
@@ -0,0 +1,184 @@
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui import notifier
+
+
+class FakeSender:
+    """Records every batch; recipients in `refuse` fail, everything else is sent."""
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.batches = []
+
+    def send_batch(self, batch):
+        self.batches.append(batch)
+        sent = [row[0] for row in batch if row[2] not in self.refuse]
+        failed = [(row[0], "550 refused") for row in batch if row[2] in self.refuse]
+        return sent, failed
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib.send_message; RCPT TO bad@... is refused with 550."""
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.reply("220 localhost test")
+        rcpts, in_data = [], False
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.received.extend(rcpts)
+                    rcpts = []
+                    self.reply("250 queued")
+                continue
+            cmd = line[:4].upper()
+            if cmd in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif cmd in ("MAIL", "RSET", "NOOP"):
+                if cmd == "RSET":
+                    rcpts = []
+                self.reply("250 ok")
+            elif cmd == "RCPT":
+                address = line.split(":", 1)[1].strip(" <>")
+                if address.startswith("bad"):
+                    self.reply("550 no such user")
+                else:
+                    rcpts.append(address)
+                    self.reply("250 ok")
+            elif cmd == "DATA":
+                in_data = True
+                self.reply("354 go ahead")
+            elif cmd == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class OutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outbox = notifier.Outbox(os.path.join(self.tmp.name, "outbox.db"))
+        self.clock = 1_000_000.0
+        self._now = notifier._now
+        notifier._now = lambda: self.clock
+
+    def tearDown(self):
+        notifier._now = self._now
+        self.outbox._conn().close()
+        self.tmp.cleanup()
+
+    def status(self, key):
+        return self.outbox._conn().execute(
+            "SELECT status, attempts, next_attempt_at FROM outbox WHERE idem_key = ?", (key,)
+        ).fetchone()
+
+
+class OutboxTest(OutboxTestCase):
+    def test_same_key_is_stored_once(self):
+        msg = ("email", "a@x.org", "Alert", "body", "k1")
+        self.assertEqual(self.outbox.enqueue_many([msg, msg]), 1)
+        self.assertEqual(self.outbox.enqueue_many([msg]), 0)
+        # Without an explicit key, identical messages hash to the same key
+        self.assertEqual(self.outbox.enqueue_many([("email", "b@x.org", "A", "b", None)] * 2), 1)
+        self.assertEqual(self.outbox.counts(), {'pending': 2})
+
+    def test_failure_backs_off_then_retries(self):
+        self.outbox.enqueue_many([("email", "a@x.org", "Alert", "body", "k1")])
+        (msg_id, *_), = self.outbox.claim("email")
+        self.outbox.mark_failed([(msg_id, "timeout")])
+        status, attempts, due = self.status("k1")
+        self.assertEqual((status, attempts, due), ('pending', 1, self.clock + notifier.BACKOFF_BASE))
+        self.assertEqual(self.outbox.claim("email"), [])
+
+        self.clock += notifier.BACKOFF_BASE
+        (retry_id, *_), = self.outbox.claim("email")
+        self.outbox.mark_failed([(retry_id, "timeout")])
+        self.assertEqual(self.status("k1")[2], self.clock + 2 * notifier.BACKOFF_BASE)
+
+    def test_gives_up_after_max_attempts(self):
+        self.outbox.enqueue_many([("email", "a@x.org", "Alert", "body", "k1")])
+        for attempt in range(1, notifier.MAX_ATTEMPTS + 1):
+            self.clock += notifier.BACKOFF_MAX
+            (msg_id, *_), = self.outbox.claim("email")
+            self.outbox.mark_failed([(msg_id, "refused")])
+            self.assertEqual(self.status("k1")[:2], ('failed' if attempt == notifier.MAX_ATTEMPTS else 'pending', attempt))
+        self.clock += notifier.BACKOFF_MAX
+        self.assertEqual(self.outbox.claim("email"), [])
+
+    def test_stale_sending_rows_are_reclaimed(self):
+        self.outbox.enqueue_many([("email", "a@x.org", "Alert", "body", "k1")])
+        first = self.outbox.claim("email")
+        self.assertEqual(self.status("k1")[0], 'sending')
+        # Still claimed by the process that took it
+        self.clock += notifier.STALE_CLAIM - 1
+        self.assertEqual(self.outbox.claim("email"), [])
+        # That process never finished: the row is sent again
+        self.clock += 2
+        self.assertEqual(self.outbox.claim("email"), first)
+
+
+class DispatcherTest(OutboxTestCase):
+    def test_drain_sends_due_messages_in_batches(self):
+        sender = FakeSender(refuse={"bad@x.org"})
+        dispatcher = notifier.Dispatcher(self.outbox, {'email': sender}, batch_size=2)
+        self.outbox.enqueue_many([("email", f"g{i}@x.org", "A", f"body {i}", f"k{i}") for i in range(5)]
+                                 + [("email", "bad@x.org", "A", "b", "kbad")])
+        self.assertEqual(dispatcher.drain(), 5)
+        self.assertEqual([len(b) for b in sender.batches], [2, 2, 2])
+        self.assertEqual(self.outbox.counts(), {'sent': 5, 'pending': 1})
+        self.assertEqual(self.status("kbad")[1], 1)
+
+    def test_channel_without_sender_stays_queued(self):
+        dispatcher = notifier.Dispatcher(self.outbox, {'email': FakeSender()})
+        self.outbox.enqueue_many([("sms", "+100", "", "text", "s1")])
+        self.assertEqual(dispatcher.drain(), 0)
+        self.assertEqual(self.outbox.counts(), {'pending': 1})
+
+
+class SMTPSenderTest(OutboxTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.received = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        super().tearDown()
+
+    def test_send_through_local_smtp(self):
+        sender = notifier.SMTPSender("127.0.0.1", self.server.server_address[1], user=None, starttls=False)
+        dispatcher = notifier.Dispatcher(self.outbox, {'email': sender})
+        self.outbox.enqueue_many([("email", "a@x.org", "A", "one", "k1"), ("email", "bad@x.org", "A", "two", "k2"),
+                                  ("email", "c@x.org", "A", "three", "k3")])
+        self.assertEqual(dispatcher.drain(), 2)
+        self.assertEqual(self.server.received, ["a@x.org", "c@x.org"])
+        self.assertEqual(self.status("k2")[:2], ('pending', 1))
+
+    def test_unreachable_server_fails_the_whole_batch(self):
+        port = self.server.server_address[1]
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        sender = notifier.SMTPSender("127.0.0.1", port, user=None, starttls=False, timeout=2)
+        self.outbox.enqueue_many([("email", "a@x.org", "A", "one", "k1"), ("email", "b@x.org", "A", "two", "k2")])
+        self.assertEqual(notifier.Dispatcher(self.outbox, {'email': sender}).drain(), 0)
+        self.assertEqual(self.outbox.counts(), {'pending': 2})
+        self.assertEqual(self.status("k1")[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+# web_auth.py
+
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import wraps
+
+import bcrypt
+from flask import Blueprint, g, redirect, render_template, request, session, url_for
+
+from models.db_pool import ConnectionPool
+from models.lru_cache import LRUCache
+from models.metrics import register_cache
+
+USERS_DB = "data/users.db"
+DB_POOL_SIZE = int(os.environ.get('EDUSENSE_DB_POOL_SIZE', 4))
+# bcrypt is deliberately slow; cap how many checks run at once and how many may wait
+BCRYPT_WORKERS = int(os.environ.get('EDUSENSE_BCRYPT_WORKERS', 2))
+BCRYPT_MAX_PENDING = int(os.environ.get('EDUSENSE_BCRYPT_MAX_PENDING', 16))
+BCRYPT_TIMEOUT = 10
+SESSION_TTL = 12 * 3600
+SESSION_CACHE_SIZE = 4096
+# Cached sessions are re-read from users.db after this long, so a logout in another worker takes effect
+SESSION_RECHECK = 60
+# Reachable without a login when EDUSENSE_REQUIRE_LOGIN=1 (Prometheus cannot log in to scrape /metrics)
+PUBLIC_ENDPOINTS = {'auth.login', 'static', 'metrics.prometheus'}
+# Always behind a login once auth is registered: the exports carry every student's data
+PROTECTED_BLUEPRINTS = {'exports'}
+# Unknown emails are checked against this so both paths take as long; hashed once, at import
+DUMMY_HASH = bcrypt.hashpw(b"not-a-password", bcrypt.gensalt()).decode()
+
+class LoginBusy(Exception):
+    """Raised when too many password checks are already queued, or one took longer than BCRYPT_TIMEOUT."""
+
+
+class UserStore:
+    """
+    users.db (shared with the desktop login dialog) behind a connection pool.
+    Password checks run on a small, bounded thread pool; successful logins get
+    a random session token stored in the sessions table and cached in memory,
+    so later requests are validated without touching bcrypt or, usually, SQLite.
+    """
+    def __init__(self, path=USERS_DB, pool_size=DB_POOL_SIZE, bcrypt_workers=BCRYPT_WORKERS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.pool = ConnectionPool(path, size=pool_size)
+        self.sessions = LRUCache(SESSION_CACHE_SIZE)
+        register_cache('sessions', self.sessions)
+        self._bcrypt = ThreadPoolExecutor(max_workers=bcrypt_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(bcrypt_workers + BCRYPT_MAX_PENDING)
+        self._init_db()
+
+    def _init_db(self):
+        with self.pool.connection() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS users (
+                email TEXT PRIMARY KEY,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL
+            )""")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "token TEXT PRIMARY KEY, email TEXT NOT NULL, role TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    # --- Passwords ---
+    def _check_password(self, password, hashed):
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            future = self._bcrypt.submit(bcrypt.checkpw, password.encode(), hashed.encode())
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the check finishes, not when we stop waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=BCRYPT_TIMEOUT)
+        except FutureTimeout:
+            raise LoginBusy() from None
+
+    def create_user(self, email, password, role):
+        hashed = self._bcrypt.submit(bcrypt.hashpw, password.encode(), bcrypt.gensalt()).result().decode()
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO users (email, password, role) VALUES (?, ?, ?)", (email, hashed, role))
+
+    def authenticate(self, email, password):
+        """Returns {'email', 'role'} for valid credentials, else None. May raise LoginBusy."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT password, role FROM users WHERE email = ?", (email,)).fetchone()
+        ok = self._check_password(password, row[0] if row else DUMMY_HASH)
+        return {'email': email, 'role': row[1]} if ok and row else None
+
+    # --- Sessions ---
+    def open_session(self, user):
+        token = secrets.token_urlsafe(32)
+        expires_at = time.time() + SESSION_TTL
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+            conn.execute("INSERT INTO sessions (token, email, role, expires_at) VALUES (?, ?, ?, ?)",
+                         (token, user['email'], user['role'], expires_at))
+        self.sessions.put(token, (user, expires_at, time.time()))
+        return token
+
+    def session_user(self, token):
+        """The user for a session token, from the cache or (on a miss, e.g. another worker's login) the sessions table."""
+        if not token:
+            return None
+        now = time.time()
+        cached = self.sessions.get(token)
+        if cached is None or now - cached[2] > SESSION_RECHECK:
+            with self.pool.connection() as conn:
+                row = conn.execute("SELECT email, role, expires_at FROM sessions WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                self.sessions.discard(token)
+                return None
+            cached = ({'email': row[0], 'role': row[1]}, row[2], now)
+            self.sessions.put(token, cached)
+        user, expires_at, _ = cached
+        if expires_at < now:
+            self.close_session(token)
+            return None
+        return user
+
+    def close_session(self, token):
+        self.sessions.discard(token)
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+
+_users = None
+_users_lock = threading.Lock()
+
+def get_user_store():
+    global _users
+    if _users is None:
+        with _users_lock:
+            if _users is None:
+                _users = UserStore()
+    return _users
+
+# --- Routes ---
+auth = Blueprint('auth', __name__)
+
+def current_user():
+    if 'user' not in g:
+        g.user = get_user_store().session_user(session.get('token'))
+    return g.user
+
+def login_required(view):
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if current_user() is None:
+            return redirect(url_for('auth.login', next=request.path))
+        return view(*args, **kwargs)
+    return wrapped
+
+@auth.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'GET':
+        return render_template('login.html')
+    users = get_user_store()
+    try:
+        user = users.authenticate(request.form.get('email', ''), request.form.get('password', ''))
+    except LoginBusy:
+        return render_template('login.html', error="Too many login attempts right now, please try again."), 503
+    if user is None:
+        return render_template('login.html', error="Incorrect email or password."), 401
+    session.clear()
+    session['token'] = users.open_session(user)
+    target = request.args.get('next', '')
+    # Only follow local paths
+    return redirect(target if target.startswith('/') and not target.startswith('//') else url_for('auth.account'))
+
+@auth.route('/logout')
+def logout():
+    token = session.pop('token', None)
+    if token:
+        get_user_store().close_session(token)
+    return redirect(url_for('auth.login'))
+
+@auth.route('/account')
+@login_required
+def account():
+    return render_template('dashboard.html', **current_user())
+
+@auth.route('/analytics/')
+def analytics():
+    # The analytics dashboard is the Dash app mounted at the root
+    return redirect('/')
+
+def register_auth(server):
+    """
+    Adds the login routes. The session cookie is signed with EDUSENSE_SECRET_KEY;
+    set it in production so every worker accepts the same cookies.
+    The /export routes always require a login; with EDUSENSE_REQUIRE_LOGIN=1
+    the whole app (Dash included) does.
+    """
+    server.secret_key = server.secret_key or os.environ.get('EDUSENSE_SECRET_KEY') or secrets.token_hex(32)
+    server.register_blueprint(auth)
+    require_all = os.environ.get('EDUSENSE_REQUIRE_LOGIN') == '1'
+
+    @server.before_request
+    def require_login():
+        protected = request.blueprint in PROTECTED_BLUEPRINTS or (require_all and request.endpoint not in PUBLIC_ENDPOINTS)
+        if protected and current_user() is None:
+            return redirect(url_for('auth.login', next=request.path))
+    return server
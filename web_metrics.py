@@ -0,0 +1,51 @@
+# web_metrics.py
+
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+from flask import Blueprint, Response, g, request
+
+from models.metrics import (
+    CALLBACK_ERRORS, CALLBACK_REQUEST_BYTES, CALLBACK_RESPONSE_BYTES, CALLBACK_SECONDS, exposition, get_writer, timed,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def timed_callback(fn):
+    """
+    Times a Dash callback under edusense_callback_duration_seconds{callback=<its name>}
+    and tags the request, so its payload sizes are counted under the same name.
+    PreventUpdate is Dash's way of returning nothing and is not counted as an error.
+    """
+    inner = timed(CALLBACK_SECONDS, CALLBACK_ERRORS, fn.__name__, ignore=PreventUpdate)(fn)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.dash_callback = fn.__name__
+        return inner(*args, **kwargs)
+    return wrapper
+
+# --- Routes ---
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('/metrics')
+def prometheus():
+    return Response(exposition(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+def count_payload(response):
+    name = g.get('dash_callback')
+    if name:
+        CALLBACK_REQUEST_BYTES.inc(request.content_length or 0, name)
+        CALLBACK_RESPONSE_BYTES.inc(response.calculate_content_length() or 0, name)
+    return response
+
+def register_metrics(server):
+    """
+    Serves /metrics in Prometheus text format and counts callback payload bytes.
+    Under gunicorn, set EDUSENSE_METRICS_DIR to a directory shared by the workers
+    so every scrape reports all of them, not just the worker that answered.
+    """
+    server.register_blueprint(metrics)
+    server.after_request(count_payload)
+    get_writer()
+    return server